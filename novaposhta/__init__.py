@@ -1,5 +1,13 @@
-from . import models # noqa
+from importlib import import_module
+
 from .api import NovaPoshta
 
 __author__ = 'semolex'
 __all__    = ['NovaPoshta']
+
+
+def __getattr__(name):
+    # `novaposhta.models` is imported on first use, see `NovaPoshta.__getattr__`
+    if name == "models":
+        return import_module(".models", __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,15 +1,22 @@
 import logging
 import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from importlib import import_module
 
 import attr
-import requests
 
 from . import conf
 from . import serializer
-from .exceptions import ApiError, AuthError
+from . import validation
+from .exceptions import ApiError, AuthError, AUTH_ERROR_CODES
+from .scheduler import current_priority, set_priority
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()
+
 
 @attr.s
 class NovaPoshta(object):
@@ -19,12 +26,32 @@ class NovaPoshta(object):
     """
     _registered_models = {}
 
-    api_key  = attr.ib(default=conf.API_KEY)
-    endpoint = attr.ib(default=conf.API_ENDPOINT)
+    api_key  = attr.ib(default=attr.Factory(lambda: conf.get('api_key')))
+    endpoint = attr.ib(default=attr.Factory(lambda: conf.get('api_endpoint')))
+    # print forms and labels are served by personal account site, see `printing` module
+    print_endpoint = attr.ib(default=attr.Factory(lambda: conf.get('print_endpoint')), repr=False)
     timeout  = attr.ib(default=None)
+    breaker  = attr.ib(default=None)
+    hedger   = attr.ib(default=None)
+    # memory savings for big listings, see `identity` module
+    intern_strings = attr.ib(default=False)
+    identity_map   = attr.ib(default=None)
+    # response cache for read-only methods, see `cache.ResponseCache`
+    cache    = attr.ib(default=attr.Factory(lambda: _default_cache()))
+    # max connections kept to the endpoint, should cover concurrent requests
+    pool_size = attr.ib(default=10)
+    # threads for concurrent requests of bulk methods and workflows
+    max_workers = attr.ib(default=8)
+    # check requests locally before sending, see `validation` module
+    validate = attr.ib(default=True)
+    # concurrency and rate by priority class, see `scheduler.PriorityScheduler`
+    scheduler = attr.ib(default=None)
 
     def __getattr__(self, key):
         if key[0].isupper():
+            if key not in self._registered_models:
+                # models are registered when `novaposhta.models` is first imported
+                import_module(".models", __package__)
             model = self._registered_models[key]
             model.api = self
             setattr(self, key, model)
@@ -39,12 +66,47 @@ class NovaPoshta(object):
     @property
     def session(self):
         if not hasattr(self, "_session"):
+            import requests
+            from requests.adapters import HTTPAdapter
             self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_maxsize=self.pool_size))
             self._session.headers.update({
                 "Content-Type": "application/json",
             })
         return self._session
 
+    @property
+    def executor(self):
+        if not hasattr(self, "_executor"):
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="novaposhta",
+            )
+        return self._executor
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Runs `func` in client's thread pool, returns `Future`.
+        Called from the pool itself, runs `func` right away,
+        so nested bulk calls can't exhaust the pool and deadlock.
+        """
+        if getattr(_local, "in_pool", False):
+            future = Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        return self.executor.submit(
+            _run_in_pool, current_priority(), func, args, kwargs,
+        )
+
+    def map(self, func, *iterables):
+        """
+        Concurrent `map`, returns list of results in order.
+        """
+        futures = [self.submit(func, *args) for args in zip(*iterables)]
+        return [f.result() for f in futures]
+
     def send(self, url, model_name, method, method_props=None):
         """
         Primary function for API requests and data fetching.
@@ -64,13 +126,36 @@ class NovaPoshta(object):
         :rtype:
             dict
         """
+        return self._send(self.api_key, url, model_name, method, method_props)
+
+    def _send(self, api_key, url, model_name, method, method_props=None):
         query = {
             'modelName': model_name,
             'calledMethod': method,
             'methodProperties': _clean_properties(method_props or {}),
-            'apiKey': self.api_key,
+            'apiKey': api_key,
         }
+        if self.validate:
+            validation.validate(model_name, method, query['methodProperties'])
+        read_only = is_read_only(method)
+        props_key = json.dumps(query['methodProperties'], sort_keys=True, default=serializer.encoder)
+        post = partial(self._post, url, query)
+        if self.scheduler is not None:
+            post = partial(self.scheduler.call, current_priority(), post)
+        if self.hedger is not None and read_only:
+            post = partial(self.hedger.call, (model_name, method), post)
+        if self.breaker is not None:
+            circuit_key = (url, api_key)
+            stale_key = (circuit_key, model_name, method, props_key) if read_only else None
+            post = partial(self.breaker.call, circuit_key, post, stale_key=stale_key)
+        if self.cache is not None and read_only:
+            post = partial(
+                self.cache.call, model_name, method,
+                (url, api_key, model_name, method, props_key), post,
+            )
+        return post()
 
+    def _post(self, url, query):
         logger.debug("send: %s\n%s", url, _safe_query_for_logging(**query))
         resp = self.session.post(
             url,
@@ -87,7 +172,7 @@ class NovaPoshta(object):
                 [" * %s" % s for s in resp["warnings"]]
             )
         if not resp["success"]:
-            if resp["errorCodes"] == ['20000200068']:
+            if resp["errorCodes"] and AUTH_ERROR_CODES.issuperset(resp["errorCodes"]):
                 errcls = AuthError
             else:
                 errcls = ApiError
@@ -105,6 +190,28 @@ class NovaPoshta(object):
         return endpoint
 
 
+def _run_in_pool(priority, func, args, kwargs):
+    _local.in_pool = True
+    set_priority(priority)
+    return func(*args, **kwargs)
+
+
+def _default_cache():
+    options = conf.get('cache')
+    if not options:
+        return None
+    # cache options can be set only in django settings
+    from .contrib.django.cache import DjangoCache
+    return DjangoCache(**options)
+
+
+def is_read_only(method):
+    """
+    Read-only API methods are safe to repeat, cache or serve stale.
+    """
+    return method[:3].lower() == "get" or method.startswith("CheckPossibility")
+
+
 def _safe_query_for_logging(**q):
     if q["apiKey"]:
         q["apiKey"] = "*" * len(q["apiKey"])
@@ -120,4 +227,8 @@ def _truncate(string, length=500):
 
 
 def _clean_properties(method_properties):
-    return dict((k, v) for k, v in method_properties.items() if v)
+    # drops empty values, but not zeros and `False`
+    return dict(
+        (k, v) for k, v in method_properties.items()
+        if v or isinstance(v, (int, float))
+    )
@@ -0,0 +1,135 @@
+"""
+Autocomplete for `Address.get_streets` and `Address.get_cities` with prefix reuse.
+
+When result for a shorter prefix is known to be complete (less than `limit` items),
+longer queries are answered by filtering it locally, without API calls.
+
+:example:
+    ``streets = autocomplete.streets()``
+    ``session = streets.session(city_ref)``
+    ``session.query("Незал")      # api call``
+    ``session.query("Незалеж")    # filtered locally``
+"""
+import threading
+from collections import OrderedDict
+
+from .models import Address
+
+
+class PrefixCache(object):
+    """
+    Caches search results per scope (city) and query.
+
+    :param fetch:
+        `fetch(scope, text, limit)`, returns list of objects
+    :param fields:
+        attributes, matched by API search, used for local filtering
+    """
+
+    def __init__(self, fetch, limit=500, max_entries=10000, fields=("Description", "DescriptionRu")):
+        self.fetch = fetch
+        self.limit = limit
+        self.max_entries = max_entries
+        self.fields = fields
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, scope, text):
+        """
+        Returns results known without API call, or `None`.
+        """
+        text = normalize(text)
+        with self._lock:
+            for end in range(len(text), 0, -1):
+                key = (scope, text[:end])
+                results = self._entries.get(key)
+                if results is not None:
+                    self._entries.move_to_end(key)
+                    break
+            else:
+                return None
+        if end == len(text):
+            return results
+        return [obj for obj in results if self._matches(obj, text)]
+
+    def store(self, scope, text, results):
+        # incomplete results can't be filtered locally, and are not cached
+        if len(results) >= self.limit:
+            return
+        with self._lock:
+            self._entries[(scope, normalize(text))] = results
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, scope, text):
+        if not normalize(text):
+            return []
+        results = self.lookup(scope, text)
+        if results is None:
+            results = self.fetch(scope, text.strip(), self.limit)
+            self.store(scope, text, results)
+        return results
+
+    def session(self, scope=None):
+        return AutocompleteSession(self, scope)
+
+    def _matches(self, obj, text):
+        for field in self.fields:
+            value = getattr(obj, field, None)
+            if value and text in normalize(value):
+                return True
+        return False
+
+
+class AutocompleteSession(object):
+    """
+    Queries of one input field, e.g. one user typing a street name.
+    Only one API request per session is in flight, and only the newest query is sent,
+    older ones waiting for their turn are dropped.
+    `query` returns `None` for superseded queries, result of in-flight request
+    can't be cancelled, but it is still cached for the next queries.
+    """
+
+    def __init__(self, cache, scope):
+        self.cache = cache
+        self.scope = scope
+        self._request_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def query(self, text):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        if not normalize(text):
+            return []
+        results = self.cache.lookup(self.scope, text)
+        if results is not None:
+            return results
+
+        with self._request_lock:
+            if generation != self._generation:
+                return None
+            # previous request may have brought results for this query
+            results = self.cache.get(self.scope, text)
+        if generation != self._generation:
+            return None
+        return results
+
+
+def normalize(text):
+    return (text or "").strip().lower()
+
+
+def streets(**kwargs):
+    return PrefixCache(
+        lambda city_ref, text, limit: Address.get_streets(city_ref, find=text, limit=limit),
+        **kwargs
+    )
+
+
+def cities(**kwargs):
+    return PrefixCache(
+        lambda scope, text, limit: Address.get_cities(find=text, limit=limit),
+        **kwargs
+    )
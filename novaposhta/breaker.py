@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import attr
+
+from .exceptions import CircuitOpenError, RETRYABLE, classify_error
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+@attr.s
+class Circuit(object):
+    state = attr.ib(default=CLOSED)
+    failures = attr.ib(default=0)
+    opened_at = attr.ib(default=None)
+    probes = attr.ib(default=0)
+
+
+@attr.s
+class CircuitBreaker(object):
+    """
+    Circuit breaker for `NovaPoshta.send`, one circuit per endpoint and API key.
+
+    After `failure_threshold` consecutive retryable failures (see `classify_error`)
+    the circuit opens and calls fail fast with `CircuitOpenError`,
+    or return last known data for read-only methods if `serve_stale` is set.
+    After `reset_timeout` seconds up to `half_open_max_calls` probe requests are let through,
+    first successful probe closes the circuit, failed one opens it again.
+
+    :example:
+        ``NovaPoshta(breaker=CircuitBreaker(failure_threshold=3, reset_timeout=10))``
+    """
+    failure_threshold   = attr.ib(default=5)
+    reset_timeout       = attr.ib(default=30.0)
+    half_open_max_calls = attr.ib(default=1)
+    serve_stale         = attr.ib(default=True)
+    stale_max_age       = attr.ib(default=24 * 3600)
+    stale_max_entries   = attr.ib(default=1000)
+    clock               = attr.ib(default=time.monotonic, repr=False)
+
+    def __attrs_post_init__(self):
+        self._lock = threading.Lock()
+        self._circuits = {}
+        self._stale = OrderedDict()
+
+    def state(self, key):
+        with self._lock:
+            return self._get_circuit(key).state
+
+    def call(self, key, func, stale_key=None):
+        """
+        Calls `func` through the circuit identified by `key`.
+        `stale_key` should be passed only for read-only calls,
+        successful results are stored under it and served while the circuit is open.
+        """
+        with self._lock:
+            circuit = self._get_circuit(key)
+            retry_after = self._acquire(circuit)
+        if retry_after is not None:
+            stale = self._get_stale(stale_key)
+            if stale is not None:
+                logger.warning("circuit is open, serving stale data for %s", stale_key[1:3])
+                return stale
+            raise CircuitOpenError(retry_after)
+
+        try:
+            result = func()
+        except Exception as exc:
+            with self._lock:
+                if classify_error(exc) == RETRYABLE:
+                    self._on_failure(circuit)
+                else:
+                    # service did respond, so it is up
+                    self._on_success(circuit)
+            raise
+
+        with self._lock:
+            self._on_success(circuit)
+            if stale_key is not None and self.serve_stale:
+                self._stale[stale_key] = (self.clock(), result)
+                self._stale.move_to_end(stale_key)
+                while len(self._stale) > self.stale_max_entries:
+                    self._stale.popitem(last=False)
+        return result
+
+    def _get_circuit(self, key):
+        try:
+            return self._circuits[key]
+        except KeyError:
+            circuit = self._circuits[key] = Circuit()
+            return circuit
+
+    def _acquire(self, circuit):
+        """
+        Returns `None` if call is allowed, or number of seconds until next probe.
+        """
+        if circuit.state == CLOSED:
+            return None
+        now = self.clock()
+        if circuit.state == OPEN:
+            elapsed = now - circuit.opened_at
+            if elapsed < self.reset_timeout:
+                return self.reset_timeout - elapsed
+            circuit.state = HALF_OPEN
+            circuit.probes = 0
+        if circuit.probes < self.half_open_max_calls:
+            circuit.probes += 1
+            return None
+        return 0.0
+
+    def _on_success(self, circuit):
+        if circuit.state != CLOSED:
+            logger.info("circuit closed")
+        circuit.state = CLOSED
+        circuit.failures = 0
+        circuit.probes = 0
+
+    def _on_failure(self, circuit):
+        circuit.failures += 1
+        if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+            if circuit.state != OPEN:
+                logger.warning("circuit opened after %s failures", circuit.failures)
+            circuit.state = OPEN
+            circuit.opened_at = self.clock()
+            circuit.probes = 0
+
+    def _get_stale(self, stale_key):
+        if stale_key is None or not self.serve_stale:
+            return None
+        with self._lock:
+            try:
+                stored_at, result = self._stale[stale_key]
+            except KeyError:
+                return None
+        if self.clock() - stored_at > self.stale_max_age:
+            return None
+        return result
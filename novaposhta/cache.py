@@ -0,0 +1,97 @@
+import abc
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# model, api method, and model classmethod with kwargs to call it
+Call = namedtuple("Call", "model method func kwargs")
+
+# reference data, which is the same for every customer and changes rarely
+REFERENCE_DATA = [
+    Call("Address", "getAreas", "get_areas", {}),
+    Call("Address", "getCities", "get_cities", {}),
+    Call("Address", "getWarehouseTypes", "get_warehouse_types", {}),
+    Call("Common", "getTypesOfPayers", "get_types_of_payers", {}),
+    Call("Common", "getPaymentForms", "get_payment_forms", {}),
+    Call("Common", "getCargoTypes", "get_cargo_types", {}),
+    Call("Common", "getServiceTypes", "get_service_types", {}),
+    Call("Common", "getOwnershipFormsList", "get_ownership_forms_list", {}),
+    Call("Common", "getBackwardDeliveryCargoTypes", "get_backward_delivery_cargo_types", {}),
+    Call("Common", "getPalletsList", "get_pallets_list", {}),
+    Call("Common", "getTypesOfCounterparties", "get_type_of_counterparties", {}),
+    Call("Common", "getTypesOfPayersForRedelivery", "get_type_of_payers_for_redelivery", {}),
+    Call("Common", "getTiresWheelsList", "get_tires_wheels_list", {}),
+    Call("Common", "getTraysList", "get_trays_list", {}),
+    Call("Common", "getDocumentStatuses", "get_document_statuses", {}),
+]
+ALL_WAREHOUSES = Call("Address", "getWarehouses", "get_warehouses", {"city_ref": None})
+
+
+class ResponseCache(abc.ABC):
+    """
+    Base class for response caches of `NovaPoshta.send`, only read-only methods are cached.
+
+    :param ttl:
+        cache time in seconds, by `"Model.method"` or `"Model"`, e.g.
+        ``{"Address.getCities": 86400, "Common": 86400}``
+    :param default_ttl:
+        cache time for methods not listed in `ttl`, not cached by default
+    """
+    key_prefix = "novaposhta:"
+
+    def __init__(self, ttl=None, default_ttl=None):
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Returns cached value or `None`"""
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl):
+        pass
+
+    def get_ttl(self, model_name, method):
+        for name in ("%s.%s" % (model_name, method), model_name):
+            if name in self.ttl:
+                return self.ttl[name]
+        return self.default_ttl
+
+    def make_key(self, key_data):
+        # all models are posted to the same url, so `key_data` should include model and method
+        digest = hashlib.sha1(json.dumps(key_data).encode("utf-8")).hexdigest()
+        return self.key_prefix + digest
+
+    def call(self, model_name, method, key_data, func):
+        ttl = self.get_ttl(model_name, method)
+        if not ttl:
+            return func()
+        key = self.make_key(key_data)
+        data = self.get(key)
+        if data is None:
+            data = func()
+            self.set(key, data, ttl)
+        return data
+
+
+def warm_up(calls=REFERENCE_DATA, workers=4):
+    """
+    Fetches data for `calls` concurrently, so it is cached before first customer request.
+    Returns list of `(call, error)`, `error` is `None` for successful calls.
+    """
+    from . import models
+
+    def fetch(call):
+        try:
+            getattr(getattr(models, call.model), call.func)(**call.kwargs)
+        except Exception as exc:
+            logger.warning("warm up %s.%s failed: %s", call.model, call.method, exc)
+            return call, exc
+        return call, None
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(fetch, calls))
@@ -0,0 +1,280 @@
+"""
+Command line interface for bulk jobs, output is json lines.
+Settings are read from `NOVAPOSHTA_API_KEY` and `NOVAPOSHTA_API_POINT`.
+
+    python -m novaposhta track ttns.csv --output statuses.jsonl --state track.state
+    python -m novaposhta warehouses --city db5c88d7-391c-11dd-90d9-001a92567626
+    python -m novaposhta cities --output cities.jsonl
+    python -m novaposhta documents --date-from 01.02.2020 --date-to 29.02.2020
+
+`track` reads `DocumentNumber` and optional `Phone` from csv (with header) or json lines,
+runs requests concurrently, and writes results in input order.
+With `--state` interrupted run is resumed from the last completed batch,
+output written after it is discarded.
+Other commands fetch pages of `--page-size` records concurrently, and write them in order
+as received, without building model objects.
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from .exceptions import RETRYABLE, classify_error
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m novaposhta", description=__doc__.split("\n")[1])
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    track = commands.add_parser("track", help="track documents from csv or json lines")
+    track.add_argument("input", help="input file, '-' for stdin")
+    track.add_argument("--format", choices=["csv", "jsonl"], help="input format, by file extension by default")
+    track.add_argument("--language", default="UA")
+    track.add_argument("--batch-size", type=int, default=100, help="documents per request")
+    track.add_argument("--state", help="file to save progress to, and resume from")
+    _add_common(track)
+    track.set_defaults(run=run_track)
+
+    cities = commands.add_parser("cities", help="dump cities")
+    _add_common(cities)
+    _add_paging(cities, 500)
+    cities.set_defaults(run=run_cities)
+
+    warehouses = commands.add_parser("warehouses", help="dump warehouses")
+    warehouses.add_argument("--city", help="city ref, all warehouses by default")
+    _add_common(warehouses)
+    _add_paging(warehouses, 500)
+    warehouses.set_defaults(run=run_warehouses)
+
+    documents = commands.add_parser("documents", help="export document list")
+    documents.add_argument("--date-from", required=True, help="dd.mm.yyyy")
+    documents.add_argument("--date-to", required=True, help="dd.mm.yyyy")
+    _add_common(documents)
+    _add_paging(documents, 100)
+    documents.set_defaults(run=run_documents)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    return args.run(args)
+
+
+def _add_common(parser):
+    parser.add_argument("--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent requests")
+    parser.add_argument("--rate", type=float, help="max requests per second")
+    parser.add_argument("--retries", type=int, default=3, help="retries of failed requests")
+
+
+def _add_paging(parser, page_size):
+    parser.add_argument("--page-size", type=int, default=page_size, help="records per request")
+
+
+def run_track(args):
+    from .models import TrackingDocument
+
+    done, offset = _load_state(args.state)
+    if done and args.output == "-":
+        logger.warning("resuming with output to stdout, earlier results are not repeated")
+    elif done:
+        os.truncate(args.output, offset)
+    limiter = _limiter(args)
+
+    def track(batch):
+        return _retry(args, limiter, TrackingDocument.get_status_documents, batch, language=args.language)
+
+    with _open_input(args.input) as f, _open_output(args.output, append=bool(done)) as out:
+        rows = itertools.islice(_read_documents(f, args.format or _guess_format(args.input)), done, None)
+        batches = _batches(rows, args.batch_size)
+        with ThreadPoolExecutor(args.workers) as executor:
+            for batch, results in _ordered(executor, track, batches, window=args.workers * 2):
+                for obj in results:
+                    _write(out, obj.data)
+                out.flush()
+                done += len(batch)
+                _save_state(args.state, done, out)
+    return 0
+
+
+def run_cities(args):
+    from .models import Address
+    return _dump(args, Address, "getCities")
+
+
+def run_warehouses(args):
+    from .models import Address
+    return _dump(args, Address, "getWarehouses", CityRef=args.city)
+
+
+def run_documents(args):
+    from .models import InternetDocument
+    return _dump(
+        args, InternetDocument, "getDocumentList",
+        DateTimeFrom=args.date_from, DateTimeTo=args.date_to,
+    )
+
+
+def _dump(args, model, method, **props):
+    """
+    Writes all pages of `model.method` in order, fetching up to `--workers` pages at once.
+    Pages are requested ahead until a short page shows where the data ends.
+    """
+    limiter = _limiter(args)
+    lock = threading.Lock()
+    last_page = [None]
+
+    def fetch(page):
+        with lock:
+            if last_page[0] is not None and page > last_page[0]:
+                return []
+        data = _retry(
+            args, limiter, model.send, method,
+            dict(props, Page=page, Limit=args.page_size), raw=True,
+        )
+        if len(data) < args.page_size:
+            with lock:
+                last_page[0] = min(page, last_page[0] or page)
+        return data
+
+    def pages():
+        for page in itertools.count(1):
+            with lock:
+                if last_page[0] is not None and page > last_page[0]:
+                    return
+            yield page
+
+    with _open_output(args.output) as out, ThreadPoolExecutor(args.workers) as executor:
+        for page, rows in _ordered(executor, fetch, pages(), window=args.workers * 2):
+            for row in rows:
+                _write(out, row)
+            if page == last_page[0]:
+                break
+    return 0
+
+
+def _limiter(args):
+    return TokenBucket(args.rate) if args.rate else None
+
+
+def _retry(args, limiter, func, *func_args, **kwargs):
+    for attempt in itertools.count():
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(*func_args, **kwargs)
+        except Exception as exc:
+            if attempt >= args.retries or classify_error(exc) != RETRYABLE:
+                raise
+            delay = 2 ** attempt
+            logger.warning("request failed, retrying in %ss: %s", delay, exc)
+            time.sleep(delay)
+
+
+def _ordered(executor, func, items, window):
+    """
+    Maps `func` over `items` with at most `window` tasks in flight,
+    yields `(item, result)` in input order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(func, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def _batches(items, size):
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _read_documents(f, fmt):
+    if fmt == "csv":
+        rows = csv.DictReader(f)
+    else:
+        rows = (json.loads(line) for line in f if line.strip())
+    for row in rows:
+        doc = {"DocumentNumber": str(row["DocumentNumber"]).strip()}
+        if row.get("Phone"):
+            doc["Phone"] = str(row["Phone"]).strip()
+        yield doc
+
+
+def _guess_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _open_input(path):
+    if path == "-":
+        return _NoClose(sys.stdin)
+    return open(path, encoding="utf-8", newline="")
+
+
+def _open_output(path, append=False):
+    if path == "-":
+        return _NoClose(sys.stdout)
+    return open(path, "a" if append else "w", encoding="utf-8")
+
+
+class _NoClose(object):
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc):
+        self.f.flush()
+
+
+def _write(out, data):
+    out.write(json.dumps(data, ensure_ascii=False, default=_encoder))
+    out.write("\n")
+
+
+def _encoder(obj):
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if hasattr(obj, "data"):
+        return obj.data
+    return str(obj)
+
+
+def _load_state(path):
+    """
+    Returns number of processed input rows and output size at that moment.
+    """
+    if not path or not os.path.exists(path):
+        return 0, 0
+    with open(path) as f:
+        state = json.load(f)
+    return state["done"], state["offset"]
+
+
+def _save_state(path, done, out):
+    if not path:
+        return
+    offset = os.fstat(out.fileno()).st_size if out is not sys.stdout else 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"done": done, "offset": offset}, f)
+    os.replace(tmp_path, path)
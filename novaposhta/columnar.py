@@ -0,0 +1,74 @@
+"""
+Columnar decoding of API responses, see `Model.send(columns=...)`.
+`numpy` and `pyarrow` are optional, and imported only when used.
+"""
+from datetime import date, datetime
+
+AUTO = 'auto'
+LISTS = 'lists'
+NUMPY = 'numpy'
+ARROW = 'arrow'
+
+
+def to_columns(rows, converters=None, backend=AUTO):
+    """
+    Decodes list of api records into `{field: column}` without creating `Model` objects.
+
+    :param converters:
+        `{field: column_parser}`, see `serializer.vectorize`
+    :param backend:
+        `lists`, `numpy` (dict of arrays), `arrow` (`pyarrow.Table`)
+        or `auto` (`numpy` if installed, `lists` otherwise)
+    """
+    names = {}
+    for row in rows:
+        for name in row:
+            names.setdefault(name, None)
+    columns = dict((name, [row.get(name) for row in rows]) for name in names)
+
+    for name, convert in (converters or {}).items():
+        if name in columns:
+            columns[name] = convert(columns[name])
+
+    if backend == AUTO:
+        try:
+            import numpy  # noqa
+            backend = NUMPY
+        except ImportError:
+            backend = LISTS
+    return _BACKENDS[backend](columns)
+
+
+def _to_lists(columns):
+    return columns
+
+
+def _to_numpy(columns):
+    return dict((name, _numpy_array(values)) for name, values in columns.items())
+
+
+def _numpy_array(values):
+    import numpy as np
+    present = [v for v in values if v is not None]
+    # values parsers failed on are kept as is, such columns stay objects
+    if present and all(isinstance(v, datetime) for v in present):
+        return np.array(values, dtype="datetime64[s]")
+    if present and all(isinstance(v, date) and not isinstance(v, datetime) for v in present):
+        return np.array(values, dtype="datetime64[D]")
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return np.array([np.nan if v is None else v for v in values], dtype="float64")
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _to_arrow(columns):
+    import pyarrow
+    return pyarrow.table(columns)
+
+
+_BACKENDS = {
+    LISTS: _to_lists,
+    NUMPY: _to_numpy,
+    ARROW: _to_arrow,
+}
@@ -1,17 +1,52 @@
 from os import environ
 
-API_ENDPOINT = environ.get('NOVAPOSHTA_API_POINT', 'https://api.novaposhta.ua/v2.0/json/')
-API_KEY      = environ.get('NOVAPOSHTA_API_KEY', '')
+DEFAULT_API_ENDPOINT = 'https://api.novaposhta.ua/v2.0/json/'
+DEFAULT_PRINT_ENDPOINT = 'https://my.novaposhta.ua/orders/'
 
+_settings = None
 
-if "DJANGO_SETTINGS_MODULE" in environ:
+
+def get_settings():
+    """
+    Returns client settings, resolved on first call.
+    Django settings are not touched until a value is actually needed,
+    so importing `novaposhta` stays cheap.
+    """
+    global _settings
+    if _settings is None:
+        settings = {
+            'api_key': environ.get('NOVAPOSHTA_API_KEY', ''),
+            'api_endpoint': environ.get('NOVAPOSHTA_API_POINT', DEFAULT_API_ENDPOINT),
+            'print_endpoint': environ.get('NOVAPOSHTA_PRINT_POINT', DEFAULT_PRINT_ENDPOINT),
+        }
+        settings.update(_django_settings())
+        _settings = settings
+    return _settings
+
+
+def get(name, default=None):
+    return get_settings().get(name, default)
+
+
+def _django_settings():
+    if "DJANGO_SETTINGS_MODULE" not in environ:
+        return {}
     from django.conf import settings
     try:
-        API_KEY = settings.NOVAPOSHTA_API_SETTINGS["api_key"]
-    except (AttributeError, KeyError):
-        pass
+        return dict(settings.NOVAPOSHTA_API_SETTINGS)
+    except AttributeError:
+        return {}
+
+
+_LAZY_NAMES = {
+    'API_KEY': 'api_key',
+    'API_ENDPOINT': 'api_endpoint',
+}
+
 
+def __getattr__(name):
+    # keeps `conf.API_KEY` and `conf.API_ENDPOINT` working without resolving them at import
     try:
-        API_ENDPOINT = settings.NOVAPOSHTA_API_SETTINGS["api_endpoint"]
-    except (AttributeError, KeyError):
-        pass
+        return get(_LAZY_NAMES[name])
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
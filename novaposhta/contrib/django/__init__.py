@@ -0,0 +1,7 @@
+"""
+Django integration.
+
+Add `novaposhta.contrib.django` to `INSTALLED_APPS` for `novaposhta_warmup` command,
+and response cache options to `NOVAPOSHTA_API_SETTINGS`, see `cache.DjangoCache`.
+"""
+default_app_config = 'novaposhta.contrib.django.apps.NovaPoshtaConfig'
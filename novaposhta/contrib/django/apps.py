@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class NovaPoshtaConfig(AppConfig):
+    name = 'novaposhta.contrib.django'
+    label = 'novaposhta'
+    verbose_name = 'Nova Poshta'
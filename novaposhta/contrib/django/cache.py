@@ -0,0 +1,36 @@
+from django.core.cache import caches
+
+from ...cache import ResponseCache
+
+
+class DjangoCache(ResponseCache):
+    """
+    Response cache stored in django cache framework.
+    Used by default when `cache` is set in `NOVAPOSHTA_API_SETTINGS`:
+
+        NOVAPOSHTA_API_SETTINGS = {
+            'api_key': '12345',
+            'cache': {
+                'alias': 'default',
+                'ttl': {
+                    'Address.getCities': 24 * 3600,
+                    'Common': 24 * 3600,
+                },
+            },
+        }
+    """
+
+    def __init__(self, alias='default', **kwargs):
+        super(DjangoCache, self).__init__(**kwargs)
+        self.alias = alias
+
+    @property
+    def backend(self):
+        # django keeps cache connections per thread
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl):
+        self.backend.set(key, value, ttl)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from .... import cache
+from ....models import Model
+
+
+class Command(BaseCommand):
+    help = "Fetches Nova Poshta reference data into cache, run it on deploy"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4,
+            help="number of concurrent requests",
+        )
+        parser.add_argument(
+            "--warehouses", action="store_true",
+            help="also cache list of all warehouses",
+        )
+
+    def handle(self, *args, **options):
+        response_cache = Model.api.cache
+        if response_cache is None:
+            raise CommandError("cache is not set in NOVAPOSHTA_API_SETTINGS")
+
+        calls = list(cache.REFERENCE_DATA)
+        if options["warehouses"]:
+            calls.append(cache.ALL_WAREHOUSES)
+        # there is no point fetching data which won't be cached
+        calls = [c for c in calls if response_cache.get_ttl(c.model, c.method)]
+        if not calls:
+            raise CommandError("no reference data methods have cache ttl set")
+
+        failed = 0
+        for call, error in cache.warm_up(calls, workers=options["workers"]):
+            if error is None:
+                self.stdout.write("%s.%s: ok" % (call.model, call.method))
+            else:
+                failed += 1
+                self.stderr.write("%s.%s: %s" % (call.model, call.method, error))
+        if failed:
+            raise CommandError("%s of %s calls failed" % (failed, len(calls)))
@@ -1,4 +1,14 @@
 from collections import OrderedDict
+from json import JSONDecodeError
+
+# error classes, see `classify_error`
+RETRYABLE = 'retryable'
+CLIENT_ERROR = 'client_error'
+AUTH = 'auth'
+
+AUTH_ERROR_CODES = frozenset(['20000200068'])
+AUTH_HTTP_STATUSES = frozenset([401, 403])
+RETRYABLE_HTTP_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
 
 
 class ApiError(Exception):
@@ -7,7 +17,8 @@ class ApiError(Exception):
     """
 
     def __init__(self, codes, errors):
-        self.errors = OrderedDict(zip(ignore_empty(codes), errors))
+        self.codes = list(codes)
+        self.errors = OrderedDict(zip(ignore_empty(self.codes), errors))
 
     def __str__(self):
         return "\n".join(
@@ -22,6 +33,67 @@ class AuthError(ApiError):
         return "%s (%s)" % ((self.message,) + tuple(self.errors.values()))
 
 
+class CircuitOpenError(ApiError):
+    message = 'API is unavailable, circuit breaker is open'
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super(CircuitOpenError, self).__init__(
+            [], ["retry in %.1f seconds" % retry_after],
+        )
+
+    def __str__(self):
+        return "%s (%s)" % ((self.message,) + tuple(self.errors.values()))
+
+
+class ValidationError(ApiError):
+    """
+    Request is invalid, raised before sending it.
+    `errors` are messages by field name.
+    """
+    message = 'Request is invalid'
+
+    def __init__(self, problems):
+        errors = OrderedDict()
+        for field, message in problems:
+            errors.setdefault(field, []).append(message)
+        super(ValidationError, self).__init__(
+            list(errors.keys()), ["; ".join(messages) for messages in errors.values()],
+        )
+
+
+def classify_error(exc):
+    """
+    Sorts exception raised by `NovaPoshta.send` into one of the groups:
+    `RETRYABLE` (network failures, timeouts, server side errors),
+    `CLIENT_ERROR` (request was rejected, repeating it won't help),
+    `AUTH` (API key problems).
+    Returns `None` for exceptions not related to API calls.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return RETRYABLE
+    if isinstance(exc, AuthError) or (
+        isinstance(exc, ApiError) and AUTH_ERROR_CODES.intersection(exc.codes)
+    ):
+        return AUTH
+    if isinstance(exc, ApiError):
+        return CLIENT_ERROR
+
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        if status in AUTH_HTTP_STATUSES:
+            return AUTH
+        if status in RETRYABLE_HTTP_STATUSES or status >= 500:
+            return RETRYABLE
+        return CLIENT_ERROR
+    # `requests` exceptions (connection errors, timeouts) are `IOError` subclasses,
+    # undecodable body usually is an error page from a gateway
+    if isinstance(exc, (IOError, JSONDecodeError)):
+        return RETRYABLE
+    return None
+
+
 def ignore_empty(lst):
     for v in lst:
         yield v
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import attr
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class Hedger(object):
+    """
+    Request hedging for read-only calls of `NovaPoshta.send`.
+
+    If a call has not answered within `percentile` of latencies recently observed
+    for the same API method, identical second request is sent,
+    and whichever response comes first is used.
+    Hedged requests are limited to `budget` share of calls: each call adds `budget`
+    to hedge allowance, which is capped at `max_burst`, so allowance saved in quiet
+    periods can't be spent all at once when the API slows down.
+
+    :example:
+        ``NovaPoshta(hedger=Hedger(percentile=95, budget=0.05))``
+    """
+    percentile  = attr.ib(default=95)
+    budget      = attr.ib(default=0.05)
+    max_burst   = attr.ib(default=5.0)
+    window      = attr.ib(default=200)
+    min_samples = attr.ib(default=20)
+    min_delay   = attr.ib(default=0.05)
+    max_workers = attr.ib(default=16)
+    clock       = attr.ib(default=time.monotonic, repr=False)
+
+    def __attrs_post_init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=self.window))
+        self._allowance = 0.0
+        self._executor = None
+
+    @property
+    def executor(self):
+        # own pool, so hedged requests never wait for tasks of the caller's pool
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="novaposhta-hedge",
+                )
+            return self._executor
+
+    def delay(self, key):
+        """
+        Returns seconds to wait before hedging calls for `key`,
+        or `None` if there is not enough data yet.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies[key])
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100.0))
+        return max(self.min_delay, latencies[index])
+
+    def call(self, key, func):
+        with self._lock:
+            self._allowance = min(self.max_burst, self._allowance + self.budget)
+        delay = self.delay(key)
+        if delay is None or not self._has_budget():
+            # no hedge possible, so no reason to queue the call in the pool
+            return self._timed(key, func)
+        primary = self.executor.submit(self._timed, key, func)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+
+        logger.debug("hedging %s after %.3fs", key, delay)
+        pending = {primary, self.executor.submit(func)}
+        first = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                first = first or future
+        return first.result()
+
+    def _timed(self, key, func):
+        # latency is measured from the start of the request, time queued in the pool is not counted
+        start = self.clock()
+        try:
+            return func()
+        finally:
+            self._record(key, self.clock() - start)
+
+    def _has_budget(self):
+        with self._lock:
+            return self._allowance >= 1
+
+    def _take_budget(self):
+        with self._lock:
+            if self._allowance < 1:
+                return False
+            self._allowance -= 1
+            return True
+
+    def _record(self, key, latency):
+        with self._lock:
+            self._latencies[key].append(latency)
@@ -0,0 +1,55 @@
+"""
+Memory savings for large and long-lived response data:
+interning of repeated string values and identity map keyed by `Ref`.
+
+:example:
+    ``NovaPoshta(intern_strings=True, identity_map=IdentityMap())``
+"""
+import sys
+import threading
+import weakref
+
+
+class IdentityMap(object):
+    """
+    Keeps one object per model class and `Ref`.
+    Entity fetched again is merged into already loaded object, and that object is returned.
+    Objects are held weakly, map does not keep them alive.
+    """
+
+    def __init__(self):
+        self._objects = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def get(self, cls, ref):
+        return self._objects.get((cls, ref))
+
+    def merge(self, obj):
+        ref = getattr(obj, 'Ref', None)
+        if not isinstance(ref, str) or not ref:
+            return obj
+        key = (type(obj), ref)
+        with self._lock:
+            existing = self._objects.get(key)
+            if existing is None:
+                self._objects[key] = obj
+                return obj
+        existing.__dict__.update(obj.__dict__)
+        return existing
+
+
+def intern_values(data):
+    """
+    Interns string values of decoded response, recursively.
+    Field names are already shared by `json` decoder.
+    """
+    if isinstance(data, str):
+        return sys.intern(data)
+    if isinstance(data, dict):
+        return dict((k, intern_values(v)) for k, v in data.items())
+    if isinstance(data, list):
+        return [intern_values(v) for v in data]
+    return data
@@ -1,8 +1,30 @@
 # coding: utf-8
+import threading
+
 import attr
 
 from .api import NovaPoshta
-from .serializer import parse_datetime_universal, parse_date_dot, parse_datetime_dot
+from .columnar import to_columns
+from .exceptions import classify_error
+from .identity import intern_values
+from .serializer import (
+    parse_datetime_universal, parse_date_dot, parse_datetime_dot, parse_number, vectorize,
+)
+
+
+class _DefaultApi(object):
+    """
+    Creates the shared `NovaPoshta` client on first access,
+    so settings are not resolved at import time.
+    """
+    lock = threading.Lock()
+
+    def __get__(self, instance, owner):
+        with self.lock:
+            api = Model.__dict__["api"]
+            if api is self:
+                api = Model.api = NovaPoshta()
+        return api
 
 
 class Model(object):
@@ -11,9 +33,13 @@ class Model(object):
     """
     # api path for testapi
     test_url = "{format}/{cls}/{method}/"
-    api = NovaPoshta()
+    api = _DefaultApi()
 
     convert_attrs = {}
+    # parsers for `columns` mode, in addition to `convert_attrs`
+    column_attrs = {}
+    # loaders of related data for `prefetch`, `{name: f(cls, obj, **kwargs)}`
+    prefetch_related = {}
     result_cls = {}
 
     def __init__(self, **params):
@@ -27,6 +53,11 @@ class Model(object):
 
     @property
     def data(self):
+        if self.prefetch_related.keys() & self.__dict__.keys():
+            # prefetched data is not a part of the object
+            return dict(
+                (k, v) for k, v in self.__dict__.items() if k not in self.prefetch_related
+            )
         return self.__dict__
 
     def __repr__(self):
@@ -39,19 +70,64 @@ class Model(object):
             return "{} object".format(self.__class__.__name__)
 
     @classmethod
-    def send(cls, method, method_props=None, test_url=None, raw=False):
-        raw = cls.api.send(
+    def send(cls, method, method_props=None, test_url=None, raw=False, columns=False):
+        """
+        :param raw:
+            return data as received from API, without conversion
+        :param columns:
+            return `{field: column}` instead of objects, see `columnar.to_columns`.
+            `True` selects backend automatically, or pass `lists`, `numpy` or `arrow`.
+        """
+        data = cls.api.send(
             cls.api.build_url(cls, method, test_url or cls.test_url),
             getattr(cls, 'model_name', cls.__name__),
             method,
             method_props,
         )
+        if cls.api.intern_strings:
+            data = intern_values(data)
+        if raw:
+            return data
+        if columns:
+            return to_columns(
+                [data] if isinstance(data, dict) else data,
+                cls.get_column_converters(),
+                backend='auto' if columns is True else columns,
+            )
         result_cls = cls.get_result_cls(method)
 
-        if isinstance(raw, dict):
-            return cls._convert(result_cls, raw)
+        if isinstance(data, dict):
+            return cls._convert(result_cls, data)
         else:
-            return [cls._convert(result_cls, attrs) for attrs in raw]
+            return [cls._convert(result_cls, attrs) for attrs in data]
+
+    @classmethod
+    def from_data(cls, data):
+        return cls._convert(cls, data)
+
+    @classmethod
+    def get_column_converters(cls):
+        converters = dict((k, vectorize(f)) for k, f in cls.convert_attrs.items())
+        converters.update(cls.column_attrs)
+        return converters
+
+    @classmethod
+    def prefetch(cls, objects, names, **kwargs):
+        """
+        Fetches related data for all `objects` concurrently,
+        and sets it as object attributes, named after `prefetch_related` keys.
+        Number of concurrent requests is limited by `NovaPoshta.max_workers`.
+        """
+        unknown = set(names) - set(cls.prefetch_related)
+        if unknown:
+            raise ValueError("unknown prefetch names: %s" % ", ".join(sorted(unknown)))
+        tasks = [(obj, name) for name in names for obj in objects]
+        results = cls.api.map(
+            lambda task: cls.prefetch_related[task[1]](cls, task[0], **kwargs), tasks,
+        )
+        for (obj, name), result in zip(tasks, results):
+            setattr(obj, name, result)
+        return objects
 
     @classmethod
     def get_result_cls(cls, method):
@@ -59,6 +135,13 @@ class Model(object):
 
     @classmethod
     def _convert(cls, result_cls, data):
+        obj = cls._construct(result_cls, data)
+        if cls.api.identity_map is not None:
+            return cls.api.identity_map.merge(obj)
+        return obj
+
+    @classmethod
+    def _construct(cls, result_cls, data):
         try:
             return result_cls(**data)
         except TypeError as err:
@@ -95,24 +178,32 @@ class Address(BaseActions, Model):
     Used for parsing `geodata` (like cities, streets etc.).
     """
     test_url = "{format}/Address/{method}"
+    column_attrs = {
+        "Longitude": vectorize(parse_number),
+        "Latitude": vectorize(parse_number),
+        "PlaceMaxWeightAllowed": vectorize(parse_number),
+        "TotalMaxWeightAllowed": vectorize(parse_number),
+    }
 
     @classmethod
-    def get_cities(cls, find=None):
+    def get_cities(cls, find=None, limit=None):
         """
         Method for fetching info about all cities.
 
         :example:
             ``Address.get_cities()``
             ``Address.get_cities(find='Здолбунів')``
+        :param limit:
+            max number of results
         :return:
             list(dictionary)
         :rtype:
             list
         """
-        return cls.send(method='getCities', method_props={'FindByString': find})
+        return cls.send(method='getCities', method_props={'FindByString': find, 'Limit': limit})
 
     @classmethod
-    def get_streets(cls, city_ref, find=None):
+    def get_streets(cls, city_ref, find=None, limit=None):
         """
         Method for fetching info about streets in desired city.
 
@@ -127,27 +218,32 @@ class Address(BaseActions, Model):
             name of the target street
         :type street:
             str or unicode
+        :param limit:
+            max number of results
         :return:
             list(dictionary)
         :rtype:
             list
         """
-        props = {"CityRef": city_ref}
+        props = {"CityRef": city_ref, "Limit": limit}
         if find:
             props["FindByString"] = find
         return cls.send(method='getStreet', method_props=props)
 
     @classmethod
-    def get_warehouses(cls, city_ref):
+    def get_warehouses(cls, city_ref, columns=False):
         """
         Method for fetching info about all warehouses in desired city.
 
         :example:
             ``Address.get_warehouses(city='0006560c-4079-11de-b509-001d92f78698')``
+            ``Address.get_warehouses(city_ref=None, columns=True)``
         :param city_ref:
             ID of the target city
         :type city_ref:
             str or unicode
+        :param columns:
+            return columns instead of objects, see `Model.send`
         :return:
             parsed dictionary with all info about warehouses
         :rtype:
@@ -156,6 +252,7 @@ class Address(BaseActions, Model):
         return cls.send(
             method='getWarehouses', method_props={"CityRef": city_ref},
             test_url="{format}/AddressGeneral/{method}",
+            columns=columns,
         )
 
     @classmethod
@@ -204,27 +301,37 @@ class Counterparty(BaseActions, Model):
     """
     test_url = "Counterparty/{format}/{method}/"
     convert_attrs = {
-        "ContactPerson": lambda data: ContactPerson(**data['data'][0]),
+        "ContactPerson": lambda data: ContactPerson.from_data(data['data'][0]),
+    }
+    prefetch_related = {
+        "contact_persons": lambda cls, cp, **kwargs: cls.get_counterparty_contact_persons(cp.Ref),
+        "addresses": lambda cls, cp, cp_type='Sender', **kwargs: cls.get_counterparty_addresses(cp.Ref, cp_type),
+        "options": lambda cls, cp, **kwargs: cls.get_counterparty_options(cp.Ref),
     }
 
     @classmethod
-    def get_counterparties(cls, cp_type='Sender'):
+    def get_counterparties(cls, cp_type='Sender', prefetch=()):
         """
         Method for fetching all information about counterparties.
 
         :example:
             ``Counterparty.get_counterparties(cp_type='Recipient')``
+            ``Counterparty.get_counterparties(prefetch=['contact_persons', 'addresses', 'options'])``
         :param cp_type:
             type of the counterparty: can be either `Sender` or `Recipient` (`Sender` used as default)
         :type cp_type:
             str or unicode
+        :param prefetch:
+            related data to fetch concurrently for every counterparty,
+            `contact_persons`, `addresses` or `options`, see `Model.prefetch`
         :return:
             dictionary with info about counterparties
         :rtype:
             dict
         """
-        return cls.send(method='getCounterparties',
-                        method_props={"CounterpartyProperty": cp_type})
+        counterparties = cls.send(method='getCounterparties',
+                                  method_props={"CounterpartyProperty": cp_type})
+        return cls.prefetch(counterparties, prefetch, cp_type=cp_type)
 
     @classmethod
     def get_counterparty_by_name(cls, name, cp_type='Sender'):
@@ -603,14 +710,40 @@ class InternetDocument(BaseActions, Model):
     result_cls = {
         "save": SavedDocument,
     }
+    column_attrs = {
+        "DateTime": vectorize(parse_datetime_universal),
+        "CreateTime": vectorize(parse_datetime_universal),
+        "EstimatedDeliveryDate": vectorize(parse_datetime_universal),
+        "Cost": vectorize(parse_number),
+        "CostOnSite": vectorize(parse_number),
+        "Weight": vectorize(parse_number),
+    }
 
     @classmethod
-    def get_document_list(cls, **kwargs):
+    def get_document_list(cls, columns=False, **kwargs):
         return cls.send(
             method='getDocumentList', method_props=kwargs,
             test_url="en/{format}/{method}/",
+            columns=columns,
         )
 
+    @classmethod
+    def print_documents(cls, refs, dest, file_type="pdf", **kwargs):
+        """
+        Downloads print forms of documents, see `printing.download` for `dest`.
+        """
+        from . import printing
+        return printing.download(cls.api, "document", refs, dest, file_type, **kwargs)
+
+    @classmethod
+    def print_markings(cls, refs, dest, form="marking", file_type="pdf", **kwargs):
+        """
+        Downloads labels of documents, `form` is one of `printing.FORMS`,
+        e.g. ``"zebra"`` for label printers.
+        """
+        from . import printing
+        return printing.download(cls.api, form, refs, dest, file_type, **kwargs)
+
 
 @NovaPoshta.model
 class TrackingDocument(Model):
@@ -686,3 +819,132 @@ class AdditionalService(Model):
     @classmethod
     def delete(cls, ref):
         return cls.send(method='delete', method_props={"Ref": ref})
+
+
+@attr.s
+class ScanSheetResult(object):
+    """
+    Merged result of bulk `ScanSheet` operation.
+    """
+    Ref    = attr.ib(default=None)
+    Number = attr.ib(default=None)
+    # document refs processed successfully, in input order
+    done   = attr.ib(default=attr.Factory(list))
+    # `{document ref: error message}`
+    failed = attr.ib(default=attr.Factory(dict))
+
+    @property
+    def ok(self):
+        return not self.failed
+
+
+@NovaPoshta.model
+class ScanSheet(Model):
+    """
+    Registries (scan sheets) of internet documents.
+    Large sets of documents are sent in chunks of `chunk_size`, concurrently.
+
+    :example:
+        ``result = ScanSheet.insert_documents(refs)``
+        ``result.Ref, result.failed``
+    """
+    # documents per request
+    chunk_size = 100
+
+    @classmethod
+    def insert_documents(cls, document_refs, ref=None, date=None, chunk_size=None):
+        """
+        Adds documents to registry `ref`, or to a new one, created by the first chunk.
+        Returns `ScanSheetResult`, failed chunks don't stop others.
+        """
+        chunks = cls._chunks(document_refs, chunk_size)
+        result = ScanSheetResult(Ref=ref)
+        if chunks and ref is None:
+            cls._merge(result, chunks[0], cls._bulk("insertDocuments", chunks[0], None, date))
+            chunks = chunks[1:]
+            if result.Ref is None:
+                # registry was not created, nowhere to add the rest
+                for chunk in chunks:
+                    cls._merge(result, chunk, "registry was not created")
+                return result
+        responses = cls.api.map(
+            lambda chunk: cls._bulk("insertDocuments", chunk, result.Ref, date), chunks,
+        )
+        for chunk, data in zip(chunks, responses):
+            cls._merge(result, chunk, data)
+        return result
+
+    @classmethod
+    def remove_documents(cls, document_refs, ref, chunk_size=None):
+        """
+        Removes documents from registry `ref`, chunks are sent concurrently.
+        """
+        chunks = cls._chunks(document_refs, chunk_size)
+        result = ScanSheetResult(Ref=ref)
+        responses = cls.api.map(
+            lambda chunk: cls._bulk("removeDocuments", chunk, ref), chunks,
+        )
+        for chunk, data in zip(chunks, responses):
+            cls._merge(result, chunk, data)
+        return result
+
+    @classmethod
+    def get_scan_sheet_list(cls):
+        return cls.send(method="getScanSheetList")
+
+    @classmethod
+    def get_scan_sheet(cls, ref, counterparty_ref=None):
+        return cls.send(method="getScanSheet", method_props={
+            "Ref": ref,
+            "CounterpartyRef": counterparty_ref,
+        })
+
+    @classmethod
+    def delete_scan_sheets(cls, refs):
+        return cls.send(method="deleteScanSheet", method_props={
+            "ScanSheetRefs": list(refs),
+        })
+
+    @classmethod
+    def _chunks(cls, refs, chunk_size):
+        refs = list(refs)
+        size = chunk_size or cls.chunk_size
+        return [refs[i:i + size] for i in range(0, len(refs), size)]
+
+    @classmethod
+    def _bulk(cls, method, chunk, ref, date=None):
+        """
+        Returns response data, or error message if the whole chunk failed.
+        """
+        try:
+            return cls.send(method=method, raw=True, method_props={
+                "DocumentRefs": chunk,
+                "Ref": ref,
+                "Date": date,
+            })
+        except Exception as exc:
+            if classify_error(exc) is None:
+                raise
+            return str(exc)
+
+    @classmethod
+    def _merge(cls, result, chunk, data):
+        if isinstance(data, str):
+            result.failed.update((doc, data) for doc in chunk)
+            return
+        failed = {}
+        for item in (data if isinstance(data, list) else [data]):
+            result.Ref = result.Ref or item.get("Ref")
+            result.Number = result.Number or item.get("Number")
+            nested = item.get("Data")
+            errors = list(item.get("Errors") or [])
+            if isinstance(nested, dict):
+                errors.extend(nested.get("Errors") or [])
+            for error in errors:
+                if isinstance(error, dict) and error.get("Ref"):
+                    failed[error["Ref"]] = error.get("Error", "")
+                else:
+                    # error of the whole request
+                    failed.update((doc, str(error)) for doc in chunk)
+        result.failed.update(failed)
+        result.done.extend(doc for doc in chunk if doc not in failed)
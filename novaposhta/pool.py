@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import attr
+
+from .api import NovaPoshta, is_read_only
+from .exceptions import AUTH, RETRYABLE, classify_error
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class KeyState(object):
+    api_key       = attr.ib()
+    bucket        = attr.ib(default=None)
+    in_flight     = attr.ib(default=0)
+    backoff_until = attr.ib(default=0.0)
+    last_used     = attr.ib(default=0)
+
+
+@attr.s
+class NovaPoshtaPool(NovaPoshta):
+    """
+    Client for several accounts (API keys).
+
+    Read-only calls of shared data (cities, warehouses, tracking) are spread across keys,
+    the least busy key with free rate budget is used.
+    Key is backed off for `auth_backoff` seconds after `AuthError`,
+    and read-only call is repeated with other key.
+    Calls referencing a counterparty or document are pinned to the key which returned it,
+    other calls of `owned_models` (listings, writes) go to the first key.
+
+    :example:
+        ``api = NovaPoshtaPool(api_keys=["key1", "key2"], rate=5)``
+        ``api.Address.get_cities()``
+    """
+    api_keys     = attr.ib(default=attr.Factory(list))
+    # requests per second per key, not limited by default
+    rate         = attr.ib(default=None)
+    burst        = attr.ib(default=None)
+    auth_backoff = attr.ib(default=300.0)
+    retry_backoff = attr.ib(default=5.0)
+    max_owners   = attr.ib(default=100000)
+    # models with account's own data, refs from their responses pin writes to the key
+    owned_models = attr.ib(default=(
+        "Counterparty", "ContactPerson", "InternetDocument", "AdditionalService", "ScanSheet",
+    ))
+    clock        = attr.ib(default=time.monotonic, repr=False)
+
+    def __attrs_post_init__(self):
+        if not self.api_keys:
+            self.api_keys = [self.api_key]
+        self.api_key = self.api_keys[0]
+        self._lock = threading.Lock()
+        self._keys = OrderedDict(
+            (key, KeyState(key, TokenBucket(self.rate, self.burst) if self.rate else None))
+            for key in self.api_keys
+        )
+        self._owners = OrderedDict()
+        self._calls = 0
+
+    def pin(self, ref, api_key):
+        """
+        Pins writes referencing `ref` to `api_key`.
+        """
+        with self._lock:
+            self._owners[ref] = api_key
+            self._owners.move_to_end(ref)
+            while len(self._owners) > self.max_owners:
+                self._owners.popitem(last=False)
+
+    def owner(self, method_props):
+        with self._lock:
+            for value in (method_props or {}).values():
+                for ref in (value if isinstance(value, list) else [value]):
+                    if isinstance(ref, str) and ref in self._owners:
+                        return self._owners[ref]
+        return None
+
+    def send(self, url, model_name, method, method_props=None):
+        owner = self.owner(method_props)
+        if owner or not is_read_only(method) or model_name in self.owned_models:
+            # account's own data can be read and changed only with its key
+            key = self._keys[owner or self.api_key]
+            return self._send_with(key, url, model_name, method, method_props)
+
+        tried = set()
+        while True:
+            key = self._choose(tried)
+            tried.add(key.api_key)
+            try:
+                return self._send_with(key, url, model_name, method, method_props)
+            except Exception as exc:
+                if classify_error(exc) not in (AUTH, RETRYABLE) or len(tried) == len(self._keys):
+                    raise
+                logger.warning("retrying %s.%s with other api key: %s", model_name, method, exc)
+
+    def _choose(self, tried):
+        now = self.clock()
+        with self._lock:
+            keys = [k for k in self._keys.values() if k.api_key not in tried]
+            healthy = [k for k in keys if k.backoff_until <= now] or keys
+            # least recently used key goes first among equally loaded ones
+            key = min(healthy, key=lambda k: (
+                k.bucket.delay() if k.bucket else 0, k.in_flight, k.last_used,
+            ))
+            self._calls += 1
+            key.last_used = self._calls
+            return key
+
+    def _send_with(self, key, url, model_name, method, method_props):
+        with self._lock:
+            key.in_flight += 1
+        try:
+            if key.bucket is not None:
+                key.bucket.acquire()
+            data = self._send(key.api_key, url, model_name, method, method_props)
+        except Exception as exc:
+            kind = classify_error(exc)
+            if kind in (AUTH, RETRYABLE):
+                backoff = self.auth_backoff if kind == AUTH else self.retry_backoff
+                logger.warning("api key backed off for %ss: %s", backoff, exc)
+                with self._lock:
+                    key.backoff_until = self.clock() + backoff
+            raise
+        finally:
+            with self._lock:
+                key.in_flight -= 1
+
+        if model_name in self.owned_models:
+            for item in (data if isinstance(data, list) else [data]):
+                ref = isinstance(item, dict) and item.get("Ref")
+                if isinstance(ref, str) and ref:
+                    self.pin(ref, key.api_key)
+        return data
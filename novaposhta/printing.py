@@ -0,0 +1,105 @@
+"""
+Print forms and labels (markings) of internet documents.
+
+Documents are split into batches, one request per batch, which run concurrently
+in client's thread pool over its session. Response bodies are streamed to disk
+(or to file-like objects) in chunks, so big PDF/ZPL files are never held in memory.
+Files are written next to destination and moved in place when complete.
+
+:example:
+    ``InternetDocument.print_markings(refs, "labels/{index}.pdf")``
+    ``InternetDocument.print_documents(refs, lambda index, batch: open(...))``
+"""
+import json
+import logging
+import os
+
+from .exceptions import ApiError
+from .scheduler import current_priority
+
+logger = logging.getLogger(__name__)
+
+# url templates relative to `NovaPoshta.print_endpoint`
+FORMS = {
+    "document": "printDocument/orders/{refs}/type/{type}/apiKey/{api_key}",
+    "marking": "printMarking100x100/orders/{refs}/type/{type}/apiKey/{api_key}",
+    "marking85": "printMarking85x85/orders/{refs}/type/{type}/apiKey/{api_key}",
+    "zebra": "printMarking100x100/orders/{refs}/type/{type}/zebra/zebra/apiKey/{api_key}",
+}
+
+
+def download(api, form, refs, dest, file_type="pdf", batch_size=100, chunk_size=64 * 1024):
+    """
+    Downloads `form` for document `refs`, returns list of destinations, one per batch.
+
+    :param dest:
+        path template with `{index}` (batch number), `{form}` and `{type}` fields,
+        or callable `dest(index, batch)` returning path or binary file-like object,
+        or file-like object, when all refs fit in one batch
+    """
+    refs = list(refs)
+    batches = [refs[i:i + batch_size] for i in range(0, len(refs), batch_size)]
+    if hasattr(dest, "write") and len(batches) > 1:
+        raise ValueError("file-like destination takes at most %s documents" % batch_size)
+    targets = [_target(dest, index, batch, form, file_type) for index, batch in enumerate(batches)]
+    # batches run concurrently, shared destination would lose all of them but one
+    if len(set(t if isinstance(t, str) else id(t) for t in targets)) < len(targets):
+        raise ValueError("destination should be unique for each batch, e.g. use {index} in path")
+
+    def fetch(batch, target):
+        _stream(api, _build_url(api, form, batch, file_type), target, chunk_size)
+        return target
+
+    return api.map(fetch, batches, targets)
+
+
+def _target(dest, index, batch, form, file_type):
+    if callable(dest):
+        return dest(index, batch)
+    if isinstance(dest, str):
+        return dest.format(index=index, form=form, type=file_type)
+    return dest
+
+
+def _build_url(api, form, refs, file_type):
+    # documents of `NovaPoshtaPool` are printed with the key that created them
+    owner = getattr(api, "owner", None)
+    api_key = (owner and owner({"Refs": refs})) or api.api_key
+    return api.print_endpoint + FORMS[form].format(
+        refs=",".join(refs), type=file_type, api_key=api_key,
+    )
+
+
+def _stream(api, url, target, chunk_size):
+    logger.debug("download: %s", url.rsplit("/apiKey/", 1)[0])
+    if api.scheduler is not None:
+        api.scheduler.call(current_priority(), lambda: _fetch(api, url, target, chunk_size))
+    else:
+        _fetch(api, url, target, chunk_size)
+
+
+def _fetch(api, url, target, chunk_size):
+    with api.session.get(url, stream=True, timeout=api.timeout) as resp:
+        resp.raise_for_status()
+        # errors come as json with success status
+        if "json" in resp.headers.get("Content-Type", ""):
+            data = json.loads(resp.content.decode("utf-8"))
+            raise ApiError(data.get("errorCodes", []), data.get("errors", []))
+        if not isinstance(target, str):
+            _copy(resp, target, chunk_size)
+            return
+        tmp_path = "%s.part" % target
+        try:
+            with open(tmp_path, "wb") as f:
+                _copy(resp, f, chunk_size)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def _copy(resp, f, chunk_size):
+    for chunk in resp.iter_content(chunk_size):
+        f.write(chunk)
+
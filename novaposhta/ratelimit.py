@@ -0,0 +1,58 @@
+import threading
+import time
+
+import attr
+
+
+@attr.s
+class TokenBucket(object):
+    """
+    Rate limiter, allows `rate` requests per second on average and bursts up to `burst`.
+    """
+    rate  = attr.ib()
+    burst = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic, repr=False)
+    sleep = attr.ib(default=time.sleep, repr=False)
+
+    def __attrs_post_init__(self):
+        self.capacity = float(self.burst or max(1, self.rate))
+        self._tokens = self.capacity
+        self._updated = self.clock()
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """
+        Returns seconds until next request is allowed.
+        """
+        with self._lock:
+            self._refill()
+            return self._delay()
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """
+        Blocks until request is allowed.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = self._delay()
+            self.sleep(delay)
+
+    def _delay(self):
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
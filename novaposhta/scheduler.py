@@ -0,0 +1,143 @@
+"""
+Priority scheduling of requests sharing one client.
+
+Each call carries priority class, set with `priority` context manager for current thread.
+`PriorityScheduler` limits concurrent requests, and keeps unused reserved share
+of more important classes free, so background work only uses leftover capacity.
+Waiting requests are started in priority order, and take rate budget in that order too.
+
+:example:
+    ``api = NovaPoshta(scheduler=PriorityScheduler(max_concurrency=10))``
+    ``with priority(BACKGROUND):``
+    ``    Address.get_warehouses(None)``
+"""
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+import attr
+
+from .ratelimit import TokenBucket
+
+INTERACTIVE = 'interactive'
+DEFAULT = 'default'
+BACKGROUND = 'background'
+
+# lower goes first
+RANKS = {
+    INTERACTIVE: 0,
+    DEFAULT: 1,
+    BACKGROUND: 2,
+}
+
+_local = threading.local()
+
+
+@contextmanager
+def priority(name):
+    """
+    Sets priority class for calls made in current thread.
+    """
+    if name not in RANKS:
+        raise ValueError("unknown priority: %s" % name)
+    previous = current_priority()
+    _local.priority = name
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority():
+    return getattr(_local, 'priority', DEFAULT)
+
+
+def set_priority(name):
+    _local.priority = name
+
+
+@attr.s
+class PriorityScheduler(object):
+    """
+    :param shares:
+        share of `max_concurrency` kept for each class, less important classes can't use it
+    :param rate:
+        requests per second for all classes, not limited by default
+    :param class_rates:
+        requests per second for some classes, e.g. ``{BACKGROUND: 2}``
+    """
+    max_concurrency = attr.ib(default=10)
+    shares = attr.ib(default=attr.Factory(lambda: {INTERACTIVE: 0.5, DEFAULT: 0.2}))
+    rate = attr.ib(default=None)
+    class_rates = attr.ib(default=attr.Factory(dict))
+
+    def __attrs_post_init__(self):
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._in_flight = dict((name, 0) for name in RANKS)
+        self._reserved = dict(
+            (name, int(self.max_concurrency * self.shares.get(name, 0))) for name in RANKS
+        )
+        self._bucket = TokenBucket(self.rate) if self.rate else None
+        self._class_buckets = dict(
+            (name, TokenBucket(rate)) for name, rate in self.class_rates.items()
+        )
+
+    def call(self, name, func):
+        self.acquire(name)
+        try:
+            return func()
+        finally:
+            self.release(name)
+
+    def acquire(self, name):
+        entry = (RANKS[name], next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            # new head of the queue should recheck its turn
+            self._cond.notify_all()
+            while True:
+                timeout = None
+                if self._waiting[0] == entry and self._can_start(name):
+                    # rate budget is taken in priority order too
+                    timeout = self._rate_delay(name)
+                    if not timeout:
+                        break
+                self._cond.wait(timeout)
+            heapq.heappop(self._waiting)
+            self._take_tokens(name)
+            self._in_flight[name] += 1
+            # next waiter may be able to start too
+            self._cond.notify_all()
+
+    def release(self, name):
+        with self._cond:
+            self._in_flight[name] -= 1
+            self._cond.notify_all()
+
+    def in_flight(self, name=None):
+        with self._cond:
+            if name is None:
+                return sum(self._in_flight.values())
+            return self._in_flight[name]
+
+    def _rate_delay(self, name):
+        buckets = [b for b in (self._bucket, self._class_buckets.get(name)) if b is not None]
+        return max([b.delay() for b in buckets] or [0])
+
+    def _take_tokens(self, name):
+        # buckets are used only under `_cond`, so tokens checked by `_rate_delay` are still there
+        for bucket in (self._bucket, self._class_buckets.get(name)):
+            if bucket is not None:
+                bucket.try_acquire()
+
+    def _can_start(self, name):
+        rank = RANKS[name]
+        # keep unused reserved slots of more important classes free
+        headroom = sum(
+            max(0, self._reserved[other] - self._in_flight[other])
+            for other, other_rank in RANKS.items() if other_rank < rank
+        )
+        return sum(self._in_flight.values()) + headroom < self.max_concurrency
@@ -6,11 +6,16 @@ DATETIME_FORMAT_DOT = "%d.%m.%Y %H:%M:%S"
 DATE_FORMAT_DASH = "%d-%m-%Y"
 DATETIME_FORMAT_DASH = "%d-%m-%Y %H:%M:%S"
 
+DATE_FORMAT_ISO = "%Y-%m-%d"
+DATETIME_FORMAT_ISO = "%Y-%m-%d %H:%M:%S"
+
 ALL_FORMATS = [
     DATETIME_FORMAT_DASH,
     DATETIME_FORMAT_DOT,
+    DATETIME_FORMAT_ISO,
     DATE_FORMAT_DOT,
     DATE_FORMAT_DASH,
+    DATE_FORMAT_ISO,
 ]
 
 
@@ -28,6 +33,9 @@ parse_datetime = lambda v: datetime.strptime(v, DATETIME_FORMAT_DASH) if v else
 
 
 def parse_datetime_universal(v):
+    """
+    Parses date in any of `ALL_FORMATS`, unknown formats are returned as is.
+    """
     if not v:
         return None
     for fmt in ALL_FORMATS:
@@ -35,3 +43,42 @@ def parse_datetime_universal(v):
             return datetime.strptime(v, fmt)
         except ValueError:
             pass
+    return v
+
+
+def parse_number(v):
+    if v is None or v == "":
+        return None
+    return float(v)
+
+
+def vectorize(parser):
+    """
+    Makes column parser from value parser.
+    Each distinct value is parsed once, which matters for dates and numbers
+    repeated across thousands of rows.
+    Missing values stay `None`, values the parser fails on are kept as is,
+    like `Model.__init__` does.
+    """
+    def parse(v):
+        if v is None:
+            return None
+        try:
+            return parser(v)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return v
+
+    def parse_column(values):
+        cache = {}
+        result = []
+        append = result.append
+        for v in values:
+            try:
+                append(cache[v])
+            except KeyError:
+                append(cache.setdefault(v, parse(v)))
+            except TypeError:
+                # unhashable value, like nested dict
+                append(parse(v))
+        return result
+    return parse_column
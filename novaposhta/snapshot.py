@@ -0,0 +1,200 @@
+"""
+Read-only snapshot of directory data (cities, warehouses), shared by worker processes.
+
+One process builds snapshot file with `build_from_api` or `build_snapshot`,
+workers open it with `SnapshotStore`, which maps the file into memory,
+so all processes share one copy through the page cache.
+Snapshot is replaced atomically, readers pick up new file on `refresh`.
+
+File layout, little endian:
+    header: magic, record count, ref index offset, city index offset, city index count
+    records: json documents, one after another
+    ref index: `(ref, offset, length)` sorted by ref
+    city index: `(city_ref, offset, length)` sorted by city ref
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+MAGIC = b"NPSNAP01"
+HEADER = struct.Struct("<8sIQQI")
+# refs are uuids, 36 ascii characters
+ENTRY = struct.Struct("<36sQI")
+KEY_SIZE = 36
+
+
+def build_snapshot(path, records, city_field="CityRef"):
+    """
+    Writes `records` (dicts with `Ref`) to snapshot file at `path`, atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\0" * HEADER.size)
+            refs, cities = [], []
+            for record in records:
+                data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                entry = (f.tell(), len(data))
+                f.write(data)
+                refs.append((_key(record["Ref"]),) + entry)
+                if record.get(city_field):
+                    cities.append((_key(record[city_field]),) + entry)
+
+            ref_index = f.tell()
+            for entry in sorted(refs):
+                f.write(ENTRY.pack(*entry))
+            city_index = f.tell()
+            for entry in sorted(cities):
+                f.write(ENTRY.pack(*entry))
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, len(refs), ref_index, city_index, len(cities)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def build_from_api(path):
+    """
+    Builds snapshot with all cities and warehouses.
+    """
+    from .models import Address
+    records = [obj.data for obj in Address.get_cities()]
+    records.extend(obj.data for obj in Address.get_warehouses(None))
+    build_snapshot(path, records)
+
+
+class Snapshot(object):
+    """
+    One mapped snapshot file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.ref_index, self.city_index, self.city_count = \
+            HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("%s is not a snapshot file" % path)
+
+    def get(self, ref):
+        key = _lookup_key(ref)
+        if key is None:
+            return None
+        position = self._lower_bound(self.ref_index, self.count, key)
+        if position < self.count:
+            entry_key, offset, length = ENTRY.unpack_from(self.buffer, self.ref_index + position * ENTRY.size)
+            if entry_key == key:
+                return self._record(offset, length)
+        return None
+
+    def by_city(self, city_ref):
+        key = _lookup_key(city_ref)
+        if key is None:
+            return []
+        position = self._lower_bound(self.city_index, self.city_count, key)
+        records = []
+        while position < self.city_count:
+            entry_key, offset, length = ENTRY.unpack_from(
+                self.buffer, self.city_index + position * ENTRY.size,
+            )
+            if entry_key != key:
+                break
+            records.append(self._record(offset, length))
+            position += 1
+        return records
+
+    def _record(self, offset, length):
+        return json.loads(self.buffer[offset:offset + length].decode("utf-8"))
+
+    def _lower_bound(self, index, count, key):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.buffer[index + middle * ENTRY.size:index + middle * ENTRY.size + KEY_SIZE] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class SnapshotStore(object):
+    """
+    Lookups in snapshot file, which is reopened when replaced.
+
+    :example:
+        ``store = SnapshotStore("/var/cache/novaposhta.snapshot")``
+        ``store.get(warehouse_ref)``
+        ``store.by_city(city_ref)``
+    :param result_cls:
+        class for records, `Address` by default, `dict` to get plain data
+    :param check_interval:
+        seconds between checks for a new snapshot file
+    """
+
+    def __init__(self, path, result_cls=None, check_interval=10.0):
+        if result_cls is None:
+            from .models import Address
+            result_cls = Address
+        self.path = path
+        self.result_cls = result_cls
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = Snapshot(path)
+        self._checked = time.monotonic()
+
+    def refresh(self):
+        """
+        Switches to new snapshot file, if it was replaced. Returns `True` if switched.
+        """
+        self._checked = time.monotonic()
+        stat = os.stat(self.path)
+        current = self._snapshot.stat
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == \
+                (current.st_ino, current.st_mtime_ns, current.st_size):
+            return False
+        with self._lock:
+            # old mapping is released when last reader drops it
+            self._snapshot = Snapshot(self.path)
+        return True
+
+    @property
+    def snapshot(self):
+        if time.monotonic() - self._checked > self.check_interval:
+            self.refresh()
+        return self._snapshot
+
+    def get(self, ref):
+        data = self.snapshot.get(ref)
+        return None if data is None else self.result_cls(**data)
+
+    def by_city(self, city_ref):
+        return [self.result_cls(**data) for data in self.snapshot.by_city(city_ref)]
+
+    def __len__(self):
+        return self.snapshot.count
+
+
+def _key(ref):
+    key = ref.encode("ascii")
+    if len(key) > KEY_SIZE:
+        raise ValueError("ref is too long: %r" % ref)
+    return key.ljust(KEY_SIZE, b"\0")
+
+
+def _lookup_key(ref):
+    # strings which can't be refs are never found, instead of failing lookups
+    try:
+        return _key(ref)
+    except (AttributeError, UnicodeEncodeError, ValueError):
+        return None
@@ -0,0 +1,753 @@
+"""
+Offline tests, no API key required.
+python -m novaposhta.tests_unit
+"""
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+
+from novaposhta import autocomplete, cli, exceptions, models, workflows, NovaPoshta
+from novaposhta.cache import ResponseCache
+from novaposhta.breaker import CircuitBreaker, CLOSED, OPEN
+from novaposhta.hedging import Hedger
+from novaposhta.identity import IdentityMap
+from novaposhta.pool import NovaPoshtaPool
+from novaposhta.scheduler import BACKGROUND, INTERACTIVE, PriorityScheduler, priority
+from novaposhta.serializer import parse_number, vectorize
+from novaposhta.snapshot import SnapshotStore, build_snapshot
+
+
+def run_python(code):
+    return subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.STDOUT, universal_newlines=True,
+    )
+
+
+class FakeApi(NovaPoshta):
+    """
+    Answers requests with `handlers[(modelName, calledMethod)](methodProperties)`.
+    """
+
+    def _post(self, url, query):
+        self.queries.append(query)
+        handler = self.handlers[(query['modelName'], query['calledMethod'])]
+        return handler(query['methodProperties'])
+
+
+@contextmanager
+def fake_api(handlers, **kwargs):
+    kwargs.setdefault("api_key", "key")
+    # fake data uses short refs, see `TestValidation`
+    kwargs.setdefault("validate", False)
+    api = (FakePool if "api_keys" in kwargs else FakeApi)(**kwargs)
+    api.handlers = handlers
+    api.queries = []
+    classes = [models.Model] + list(NovaPoshta._registered_models.values())
+    saved = [(cls, cls.__dict__.get('api')) for cls in classes]
+    for cls, _ in saved:
+        cls.api = api
+    try:
+        yield api
+    finally:
+        for cls, value in saved:
+            if value is None:
+                del cls.api
+            else:
+                cls.api = value
+
+
+class TestImport(unittest.TestCase):
+    # cold start budget for `import novaposhta`, microseconds
+    budget = int(os.environ.get("NOVAPOSHTA_IMPORT_BUDGET_US", 100000))
+
+    def test_lazy_modules(self):
+        out = run_python(
+            "import sys, novaposhta\n"
+            "print(sorted(m for m in ('requests', 'django', 'novaposhta.models') if m in sys.modules))"
+        )
+        self.assertIn("[]", out)
+
+    def test_import_time(self):
+        out = run_python("import novaposhta")
+        cumulative = int(re.search(r"\|\s+(\d+) \| novaposhta$", out, re.M).group(1))
+        self.assertLess(cumulative, self.budget)
+
+    def test_models_on_first_access(self):
+        out = run_python(
+            "import sys, novaposhta\n"
+            "api = novaposhta.NovaPoshta(api_key='key')\n"
+            "print(api.Address.__name__, 'requests' in sys.modules)"
+        )
+        self.assertIn("Address False", out)
+
+
+class FakeClock(object):
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class HTTPError(IOError):
+
+    def __init__(self, status_code):
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+class TestErrors(unittest.TestCase):
+
+    def test_classify_error(self):
+        classify = exceptions.classify_error
+        self.assertEqual(classify(exceptions.AuthError(['20000200068'], ['bad key'])), exceptions.AUTH)
+        self.assertEqual(classify(exceptions.ApiError(['20000100003'], ['bad ref'])), exceptions.CLIENT_ERROR)
+        self.assertEqual(classify(HTTPError(503)), exceptions.RETRYABLE)
+        self.assertEqual(classify(HTTPError(403)), exceptions.AUTH)
+        self.assertEqual(classify(HTTPError(400)), exceptions.CLIENT_ERROR)
+        self.assertEqual(classify(IOError("timed out")), exceptions.RETRYABLE)
+        self.assertIsNone(classify(KeyError("data")))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=self.clock)
+
+    def fail(self, status=502):
+        raise HTTPError(status)
+
+    def test_open_and_half_open(self):
+        for _ in range(2):
+            self.assertRaises(HTTPError, self.breaker.call, "key", self.fail)
+        self.assertEqual(self.breaker.state("key"), OPEN)
+        self.assertRaises(exceptions.CircuitOpenError, self.breaker.call, "key", lambda: 1)
+
+        self.clock.now = 11
+        self.assertRaises(HTTPError, self.breaker.call, "key", self.fail)
+        self.assertEqual(self.breaker.state("key"), OPEN)
+
+        self.clock.now = 22
+        self.assertEqual(self.breaker.call("key", lambda: 1), 1)
+        self.assertEqual(self.breaker.state("key"), CLOSED)
+
+    def test_client_errors_do_not_open(self):
+        for _ in range(3):
+            self.assertRaises(HTTPError, self.breaker.call, "key", lambda: self.fail(400))
+        self.assertEqual(self.breaker.state("key"), CLOSED)
+
+    def test_serve_stale(self):
+        stale_key = ("key", "Address", "getAreas", "{}")
+        self.assertEqual(self.breaker.call("key", lambda: ["area"], stale_key=stale_key), ["area"])
+        for _ in range(2):
+            self.assertRaises(HTTPError, self.breaker.call, "key", self.fail, stale_key=stale_key)
+        self.assertEqual(self.breaker.call("key", self.fail, stale_key=stale_key), ["area"])
+
+
+class TestHedger(unittest.TestCase):
+
+    def test_hedge_slow_call(self):
+        hedger = Hedger(min_samples=5, min_delay=0.01, budget=0.5)
+        for _ in range(5):
+            hedger.call("getWarehouses", lambda: "fast")
+        self.assertIsNotNone(hedger.delay("getWarehouses"))
+
+        calls = []
+        released = threading.Event()
+
+        def func():
+            calls.append(1)
+            if len(calls) == 1:
+                released.wait(5)
+                return "slow"
+            return "hedged"
+
+        start = time.time()
+        self.assertEqual(hedger.call("getWarehouses", func), "hedged")
+        self.assertLess(time.time() - start, 1)
+        released.set()
+
+    def test_inline_without_hedge(self):
+        hedger = Hedger(min_samples=5)
+        threads = [hedger.call("getWarehouses", threading.current_thread) for _ in range(3)]
+        self.assertEqual(set(threads), {threading.current_thread()})
+        self.assertIsNone(hedger._executor)
+        self.assertEqual(len(hedger._latencies["getWarehouses"]), 3)
+
+    def test_budget(self):
+        hedger = Hedger(budget=0.1, max_burst=2)
+        for _ in range(1000):
+            hedger.call("getWarehouses", lambda: "fast")
+        # quiet period doesn't save more than `max_burst` hedges
+        self.assertTrue(hedger._take_budget())
+        self.assertTrue(hedger._take_budget())
+        self.assertFalse(hedger._take_budget())
+
+
+class TestColumns(unittest.TestCase):
+    documents = [
+        {"Ref": "1", "DateTime": "01.02.2020 10:00:00", "Cost": "500"},
+        {"Ref": "2", "DateTime": "01.02.2020 10:00:00", "Cost": "", "Note": "x"},
+    ]
+
+    def test_document_list_columns(self):
+        with fake_api({("InternetDocument", "getDocumentList"): lambda props: self.documents}):
+            columns = models.InternetDocument.get_document_list(columns="lists")
+        self.assertEqual(columns["Ref"], ["1", "2"])
+        self.assertEqual(columns["DateTime"], [datetime(2020, 2, 1, 10)] * 2)
+        self.assertEqual(columns["Cost"], [500.0, None])
+        self.assertEqual(columns["Note"], [None, "x"])
+
+    def test_missing_and_unknown_values(self):
+        documents = [
+            {"Ref": "1", "DateTime": "2020-02-01 10:00:00", "CreateTime": "вчора"},
+            {"Ref": "2", "DateTime": "01.02.2020 10:00:00"},
+        ]
+        with fake_api({("InternetDocument", "getDocumentList"): lambda props: documents}):
+            columns = models.InternetDocument.get_document_list(columns="lists")
+        self.assertEqual(columns["DateTime"], [datetime(2020, 2, 1, 10)] * 2)
+        self.assertEqual(columns["CreateTime"], ["вчора", None])
+
+        counterparties = [
+            {"Ref": "cp1", "ContactPerson": {"data": [{"Ref": "c1"}]}},
+            {"Ref": "cp2"},
+        ]
+        with fake_api({("Counterparty", "getCounterparties"): lambda props: counterparties}):
+            columns = models.Counterparty.send("getCounterparties", columns="lists")
+        self.assertEqual(columns["ContactPerson"][0].Ref, "c1")
+        self.assertIsNone(columns["ContactPerson"][1])
+
+    def test_unparsed_values(self):
+        self.assertEqual(vectorize(parse_number)(["1", "abc", None]), [1.0, "abc", None])
+
+    def test_numpy_mixed_columns(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        documents = [
+            {"Ref": "1", "DateTime": "01.02.2020 10:00:00", "CreateTime": "вчора", "Cost": "500"},
+            {"Ref": "2", "DateTime": "01.02.2020 10:00:00", "CreateTime": "01.02.2020", "Cost": "n/a"},
+        ]
+        with fake_api({("InternetDocument", "getDocumentList"): lambda props: documents}):
+            columns = models.InternetDocument.get_document_list(columns="numpy")
+        self.assertEqual(columns["DateTime"].dtype, numpy.dtype("datetime64[s]"))
+        self.assertEqual(columns["CreateTime"].dtype, object)
+        self.assertEqual(list(columns["Cost"]), [500.0, "n/a"])
+
+    def test_raw(self):
+        with fake_api({("InternetDocument", "getDocumentList"): lambda props: self.documents}):
+            self.assertIs(models.InternetDocument.send("getDocumentList", raw=True), self.documents)
+
+
+class TestIdentity(unittest.TestCase):
+
+    def warehouses(self, props):
+        return [
+            {"Ref": "w%s" % i, "CityDescription": "".join(["Ки", "їв"])}
+            for i in range(2)
+        ]
+
+    def test_intern_strings(self):
+        with fake_api({("Address", "getWarehouses"): self.warehouses}, intern_strings=True):
+            first, second = models.Address.get_warehouses("city")
+        self.assertIs(first.CityDescription, second.CityDescription)
+
+    def test_identity_map(self):
+        with fake_api({("Address", "getWarehouses"): self.warehouses}, identity_map=IdentityMap()) as api:
+            first = models.Address.get_warehouses("city")
+            second = models.Address.get_warehouses("city")
+        self.assertIs(first[0], second[0])
+        self.assertEqual(len(api.identity_map), 2)
+
+
+class DictCache(ResponseCache):
+
+    def __init__(self, **kwargs):
+        super(DictCache, self).__init__(**kwargs)
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl):
+        self.data[key] = value
+
+
+class TestCache(unittest.TestCase):
+
+    def test_cache_by_ttl(self):
+        cache = DictCache(ttl={"Common": 3600})
+        handlers = {
+            ("Common", "getCargoTypes"): lambda props: [{"Ref": "Cargo"}],
+            ("Counterparty", "getCounterparties"): lambda props: [],
+        }
+        with fake_api(handlers, cache=cache) as api:
+            for _ in range(2):
+                models.Common.get_cargo_types()
+                models.Counterparty.get_counterparties()
+        self.assertEqual(
+            [q['calledMethod'] for q in api.queries],
+            ["getCargoTypes", "getCounterparties", "getCounterparties"],
+        )
+
+    def test_key_by_method(self):
+        cache = DictCache(ttl={"Common": 3600})
+        handlers = {
+            ("Common", "getCargoTypes"): lambda props: [{"Ref": "Cargo"}],
+            ("Common", "getPaymentForms"): lambda props: [{"Ref": "Cash"}],
+        }
+        with fake_api(handlers, cache=cache) as api:
+            self.assertEqual(models.Common.get_cargo_types()[0].Ref, "Cargo")
+            self.assertEqual(models.Common.get_payment_forms()[0].Ref, "Cash")
+            self.assertEqual(models.Common.get_payment_forms()[0].Ref, "Cash")
+        self.assertEqual(len(api.queries), 2)
+        self.assertEqual(len(cache.data), 2)
+        self.assertRaises(TypeError, ResponseCache)
+
+
+class TestShip(unittest.TestCase):
+    handlers = {
+        ("Counterparty", "getCounterparties"): lambda props: [{"Ref": "sender"}],
+        ("Counterparty", "getCounterpartyContactPersons"): lambda props: [{"Ref": "contact"}],
+        ("Counterparty", "save"): lambda props: [
+            {"Ref": "recipient", "ContactPerson": {"data": [{"Ref": "recipient-contact"}]}},
+        ],
+        ("InternetDocument", "save"): lambda props: [{
+            "Ref": "doc", "IntDocNumber": "204500", "TypeDocument": "InternetDocument",
+            "CostOnSite": "50", "EstimatedDeliveryDate": "02.02.2020",
+        }],
+    }
+
+    def test_ship(self):
+        recipient = {"FirstName": "Тест", "LastName": "Тест", "Phone": "380631112223"}
+        with fake_api(self.handlers, api_key="ship-test") as api:
+            for _ in range(2):
+                doc = workflows.ship(recipient, CargoType="Cargo")
+        self.assertEqual(doc.IntDocNumber, "204500")
+        document = api.queries[-1]['methodProperties']
+        self.assertEqual(document["Sender"], "sender")
+        self.assertEqual(document["ContactSender"], "contact")
+        self.assertEqual(document["ContactRecipient"], "recipient-contact")
+        self.assertEqual(document["RecipientsPhone"], "380631112223")
+        methods = [q['calledMethod'] for q in api.queries]
+        self.assertEqual(methods.count("getCounterparties"), 1)
+
+    def test_ship_to_listed_counterparty(self):
+        handlers = dict(self.handlers)
+        handlers[("Counterparty", "getCounterpartyContactPersons")] = lambda props: [
+            {"Ref": "%s-contact" % props["Ref"], "Phones": "380631112223"},
+        ]
+        with fake_api(handlers, api_key="ship-listed-test") as api:
+            recipient = models.Counterparty(Ref="recipient")
+            workflows.ship(recipient, sender="sender", CargoType="Cargo")
+        document = api.queries[-1]['methodProperties']
+        self.assertEqual(document["ContactRecipient"], "recipient-contact")
+        self.assertEqual(document["RecipientsPhone"], "380631112223")
+
+
+class TestAutocomplete(unittest.TestCase):
+    streets = ["Незалежності", "Незалежна", "Незламних", "Шевченка"]
+
+    def get_streets(self, props):
+        find = props["FindByString"].lower()
+        return [{"Description": d} for d in self.streets if find in d.lower()][:props["Limit"]]
+
+    def test_prefix_reuse(self):
+        with fake_api({("Address", "getStreet"): self.get_streets}) as api:
+            session = autocomplete.streets(limit=10).session("city")
+            self.assertEqual(len(session.query("Незал")), 2)
+            self.assertEqual(len(session.query("Незале")), 2)
+            self.assertEqual([str(s) for s in session.query("незалеж ")], ["Незалежності", "Незалежна"])
+        self.assertEqual(len(api.queries), 1)
+
+    def test_incomplete_results(self):
+        with fake_api({("Address", "getStreet"): self.get_streets}) as api:
+            cache = autocomplete.streets(limit=2)
+            cache.get("city", "Не")
+            self.assertEqual(len(cache.get("city", "Нез")), 2)
+        self.assertEqual(len(api.queries), 2)
+
+
+class TestReturns(unittest.TestCase):
+
+    def check_possibility(self, props):
+        if props["Number"] == "2":
+            raise exceptions.ApiError(["20000900746"], ["Return is not possible"])
+        return [{"Ref": "address-%s" % props["Number"]}]
+
+    def test_process_returns(self):
+        handlers = {
+            ("AdditionalService", "getReturnReasons"): lambda props: [{"Ref": "r1", "Description": "Не підійшло"}],
+            ("AdditionalService", "getReturnReasonsSubtypes"): lambda props: [{"Ref": "s1", "Description": "Розмір"}],
+            ("AdditionalService", "CheckPossibilityCreateReturn"): self.check_possibility,
+            ("AdditionalService", "save"): lambda props: [{"Ref": "order-" + props["IntDocNumber"]}],
+        }
+        with fake_api(handlers, api_key="returns-test") as api:
+            results = workflows.process_returns([
+                "1", "2", {"IntDocNumber": "3", "Reason": "r2"}, {"IntDocNumber": "5", "Phone": "380631112223"},
+            ], "Не підійшло", "s1")
+            workflows.process_returns(["4"], "r1", "Розмір")
+        self.assertEqual([r.ok for r in results], [True, False, False, False])
+        self.assertEqual(results[0].order.Ref, "order-1")
+        self.assertIsInstance(results[2].error, LookupError)
+        self.assertIsInstance(results[3].error, ValueError)
+        self.assertNotIn("5", [q['methodProperties'].get("Number") for q in api.queries])
+        saved = [q['methodProperties'] for q in api.queries if q['calledMethod'] == 'save']
+        self.assertEqual(saved[0]["ReturnAddressRef"], "address-1")
+        self.assertEqual(saved[0]["Reason"], "r1")
+        methods = [q['calledMethod'] for q in api.queries]
+        self.assertEqual(methods.count("getReturnReasons"), 1)
+
+
+class FakePool(FakeApi, NovaPoshtaPool):
+    pass
+
+
+class TestPool(unittest.TestCase):
+
+    def counterparties(self, props):
+        return [{"Ref": "cp-" + self.pool.queries[-1]["apiKey"]}]
+
+    def get_cities(self, props):
+        if self.pool.queries[-1]["apiKey"] == "bad":
+            raise exceptions.AuthError(['20000200068'], ['bad key'])
+        return []
+
+    def test_pool(self):
+        handlers = {
+            ("Address", "getCities"): self.get_cities,
+            ("Counterparty", "getCounterparties"): self.counterparties,
+            ("InternetDocument", "save"): lambda props: [{"Ref": "doc"}],
+        }
+        with fake_api(handlers, api_keys=["good", "bad", "other"]) as pool:
+            self.pool = pool
+            self.assertIsInstance(pool, FakePool)
+            for _ in range(4):
+                models.Address.get_cities()
+            used = [q["apiKey"] for q in pool.queries]
+            self.assertEqual(used.count("bad"), 1)
+
+            models.Counterparty.get_counterparties()
+            owner = pool.queries[-1]["apiKey"]
+            models.InternetDocument(Sender="cp-" + owner, CitySender="city").save()
+            self.assertEqual(pool.queries[-1]["apiKey"], owner)
+
+    def test_reads_pinned_to_owner(self):
+        handlers = {
+            ("Counterparty", "getCounterparties"): self.counterparties,
+            ("Counterparty", "getCounterpartyContactPersons"): lambda props: [{"Ref": "contact"}],
+        }
+        with fake_api(handlers, api_keys=["k1", "k2", "k3"]) as pool:
+            self.pool = pool
+            for _ in range(3):
+                self.assertEqual(models.Counterparty.get_counterparties()[0].Ref, "cp-k1")
+            pool.pin("cp-k2", "k2")
+            for _ in range(3):
+                models.Counterparty.get_counterparty_contact_persons("cp-k2")
+                self.assertEqual(pool.queries[-1]["apiKey"], "k2")
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_prefetch(self):
+        handlers = {
+            ("Counterparty", "getCounterparties"): lambda props: [{"Ref": "cp1"}, {"Ref": "cp2"}],
+            ("Counterparty", "getCounterpartyContactPersons"): lambda props: [{"Ref": "contact-" + props["Ref"]}],
+            ("Counterparty", "getCounterpartyOptions"): lambda props: [{"CanPayLater": True}],
+        }
+        with fake_api(handlers) as api:
+            cps = models.Counterparty.get_counterparties(prefetch=["contact_persons", "options"])
+        self.assertEqual([cp.contact_persons[0].Ref for cp in cps], ["contact-cp1", "contact-cp2"])
+        self.assertTrue(cps[1].options[0].CanPayLater)
+        self.assertEqual(cps[0].data, {"Ref": "cp1"})
+        self.assertEqual(len(api.queries), 5)
+        self.assertRaises(ValueError, models.Counterparty.prefetch, cps, ["unknown"])
+
+    def test_prefetch_defaults(self):
+        handlers = {
+            ("Counterparty", "getCounterpartyOptions"): lambda props: [{"CanPayLater": True}],
+            ("Counterparty", "getCounterpartyAddresses"): lambda props: [{"Ref": props["CounterpartyProperty"]}],
+        }
+        with fake_api(handlers):
+            cps = [models.Counterparty(Ref="cp1")]
+            models.Counterparty.prefetch(cps, ["options", "addresses"])
+        self.assertTrue(cps[0].options[0].CanPayLater)
+        self.assertEqual(cps[0].addresses[0].Ref, "Sender")
+
+
+class TestSnapshot(unittest.TestCase):
+    city = "db5c88d7-391c-11dd-90d9-001a92567626"
+
+    def records(self, count):
+        yield {"Ref": self.city, "Description": "Київ"}
+        for i in range(count):
+            yield {"Ref": "%036d" % i, "CityRef": self.city, "Description": "Відділення №%s" % i}
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snapshot")
+            build_snapshot(path, self.records(3))
+            store = SnapshotStore(path)
+            self.assertEqual(len(store), 4)
+            self.assertEqual(str(store.get(self.city)), "Київ")
+            self.assertEqual(str(store.get("%036d" % 2)), "Відділення №2")
+            self.assertIsNone(store.get("missing"))
+            self.assertIsNone(store.get("Київ"))
+            self.assertIsNone(store.get("x" * 40))
+            self.assertEqual(store.by_city("Київ"), [])
+            self.assertEqual(len(store.by_city(self.city)), 3)
+
+            build_snapshot(path, self.records(5))
+            self.assertTrue(store.refresh())
+            self.assertEqual(len(store.by_city(self.city)), 5)
+            self.assertFalse(store.refresh())
+
+
+class TestValidation(unittest.TestCase):
+    counterparty = {
+        "CityRef": "db5c88d7-391c-11dd-90d9-001a92567626",
+        "FirstName": "Фелікс",
+        "LastName": "Яковлєв",
+        "Phone": "0997979789",
+        "Email": "",
+        "CounterpartyType": "PrivatePerson",
+        "CounterpartyProperty": "Recipient",
+    }
+
+    def test_valid(self):
+        handlers = {("Counterparty", "save"): lambda props: [{"Ref": "cp"}]}
+        with fake_api(handlers, validate=True) as api:
+            models.Counterparty(**self.counterparty).save()
+        self.assertEqual(len(api.queries), 1)
+
+    def test_all_problems_reported(self):
+        data = dict(self.counterparty, CityRef="Київ", Phone="123", LastName=None)
+        with fake_api({}, validate=True) as api:
+            with self.assertRaises(exceptions.ValidationError) as ctx:
+                models.Counterparty(**data).save()
+        self.assertEqual(list(ctx.exception.errors), ["CityRef", "LastName", "Phone"])
+        self.assertEqual(api.queries, [])
+        self.assertEqual(exceptions.classify_error(ctx.exception), exceptions.CLIENT_ERROR)
+
+    def test_zero_is_sent(self):
+        with fake_api({("InternetDocument", "getDocumentList"): lambda props: []}) as api:
+            models.InternetDocument.get_document_list(GetFullList=0, Page=None)
+        self.assertEqual(api.queries[0]["methodProperties"], {"GetFullList": 0})
+
+
+class TestCli(unittest.TestCase):
+
+    def get_status_documents(self, props):
+        numbers = [d["DocumentNumber"] for d in props["Documents"]]
+        if self.fail_on in numbers:
+            raise exceptions.ApiError([], ["interrupted"])
+        return [{"Number": n, "Status": "Отримано"} for n in numbers]
+
+    def test_track_resume(self):
+        handlers = {("TrackingDocument", "getStatusDocuments"): self.get_status_documents}
+        with tempfile.TemporaryDirectory() as tmp, fake_api(handlers) as api:
+            path = lambda name: os.path.join(tmp, name)
+            with open(path("ttns.csv"), "w") as f:
+                f.write("DocumentNumber,Phone\n" + "".join("2045%s,380501234567\n" % i for i in range(5)))
+            argv = [
+                "track", path("ttns.csv"), "--output", path("out.jsonl"), "--state", path("state"),
+                "--batch-size", "2", "--workers", "1",
+            ]
+            self.fail_on = "20452"
+            self.assertRaises(exceptions.ApiError, cli.main, argv)
+            self.fail_on = None
+            self.assertEqual(cli.main(argv), 0)
+            with open(path("out.jsonl")) as f:
+                numbers = [json.loads(line)["Number"] for line in f]
+        self.assertEqual(numbers, ["2045%s" % i for i in range(5)])
+        # first batch is not repeated on resume
+        first = [q for q in api.queries if q["methodProperties"]["Documents"][0]["DocumentNumber"] == "20450"]
+        self.assertEqual(len(first), 1)
+
+    def test_dump_pages(self):
+        warehouses = [{"Ref": "w%s" % i, "CityRef": "city"} for i in range(7)]
+
+        def get_warehouses(props):
+            start = (props["Page"] - 1) * props["Limit"]
+            return warehouses[start:start + props["Limit"]]
+        handlers = {("Address", "getWarehouses"): get_warehouses}
+        with tempfile.TemporaryDirectory() as tmp, fake_api(handlers) as api:
+            out = os.path.join(tmp, "out.jsonl")
+            argv = ["warehouses", "--city", "city", "--output", out, "--page-size", "3", "--workers", "2"]
+            self.assertEqual(cli.main(argv), 0)
+            with open(out) as f:
+                refs = [json.loads(line)["Ref"] for line in f]
+        self.assertEqual(refs, ["w%s" % i for i in range(7)])
+        self.assertEqual(api.queries[0]["methodProperties"], {"CityRef": "city", "Page": 1, "Limit": 3})
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_background_uses_leftover(self):
+        sched = PriorityScheduler(max_concurrency=2, shares={INTERACTIVE: 0.5})
+        sched.acquire(BACKGROUND)
+        started = threading.Event()
+
+        def background():
+            sched.acquire(BACKGROUND)
+            started.set()
+        thread = threading.Thread(target=background)
+        thread.start()
+        self.assertFalse(started.wait(0.1))
+
+        # slot kept for interactive calls
+        sched.acquire(INTERACTIVE)
+        self.assertEqual(sched.in_flight(), 2)
+        sched.release(INTERACTIVE)
+        sched.release(BACKGROUND)
+        self.assertTrue(started.wait(1))
+        thread.join()
+
+    def test_rate_in_priority_order(self):
+        sched = PriorityScheduler(rate=10)
+        for _ in range(10):
+            sched.call(BACKGROUND, lambda: None)
+        order = []
+
+        def run(name):
+            sched.call(name, lambda: order.append(name))
+        threads = [threading.Thread(target=run, args=(name,)) for name in (BACKGROUND, INTERACTIVE)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, [INTERACTIVE, BACKGROUND])
+
+    def test_priority_in_pool(self):
+        sched = PriorityScheduler()
+        calls = []
+
+        def call(name, func):
+            calls.append(name)
+            return func()
+        sched.call = call
+        handlers = {("Counterparty", "getCounterpartyOptions"): lambda props: []}
+        with fake_api(handlers, scheduler=sched) as api, priority(BACKGROUND):
+            api.submit(models.Counterparty.get_counterparty_options, "cp").result()
+        self.assertEqual(calls, [BACKGROUND])
+
+
+class FakeResponse(object):
+
+    def __init__(self, body, content_type="application/pdf"):
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.content = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class TestPrinting(unittest.TestCase):
+
+    def session(self, urls):
+        def get(url, stream=False, timeout=None):
+            urls.append(url)
+            refs = url.split("/orders/")[-1].split("/")[0]
+            if "bad" in refs:
+                body = json.dumps({"success": False, "errors": ["not found"], "errorCodes": ["1"]})
+                return FakeResponse(body.encode(), "application/json")
+            return FakeResponse(("%PDF " + refs).encode())
+        return type("Session", (), {"get": staticmethod(get)})()
+
+    def test_batches_to_files(self):
+        urls = []
+        with fake_api({}) as api, tempfile.TemporaryDirectory() as tmp:
+            api._session = self.session(urls)
+            paths = models.InternetDocument.print_markings(
+                ["r1", "r2", "r3"], os.path.join(tmp, "{form}-{index}.pdf"), batch_size=2, chunk_size=3,
+            )
+            self.assertEqual([os.path.basename(p) for p in paths], ["marking-0.pdf", "marking-1.pdf"])
+            with open(paths[0], "rb") as f:
+                self.assertEqual(f.read(), b"%PDF r1,r2")
+            self.assertEqual(sorted(os.listdir(tmp)), ["marking-0.pdf", "marking-1.pdf"])
+        self.assertEqual(
+            sorted(urls)[0],
+            "https://my.novaposhta.ua/orders/printMarking100x100/orders/r1,r2/type/pdf/apiKey/key",
+        )
+
+    def test_file_object_and_errors(self):
+        with fake_api({}) as api, tempfile.TemporaryDirectory() as tmp:
+            api._session = self.session([])
+            out = io.BytesIO()
+            models.InternetDocument.print_documents(["r1"], out)
+            self.assertEqual(out.getvalue(), b"%PDF r1")
+            self.assertRaises(ValueError, models.InternetDocument.print_documents, ["r1", "r2"], out, batch_size=1)
+            self.assertRaises(
+                ValueError, models.InternetDocument.print_markings,
+                ["r1", "r2", "r3"], os.path.join(tmp, "labels.pdf"), batch_size=2,
+            )
+            with self.assertRaises(exceptions.ApiError):
+                models.InternetDocument.print_documents(["bad"], os.path.join(tmp, "{index}.pdf"))
+            self.assertEqual(os.listdir(tmp), [])
+
+
+class TestScanSheet(unittest.TestCase):
+
+    def insert(self, props):
+        refs = props["DocumentRefs"]
+        if "fail" in refs:
+            raise exceptions.ApiError(["20000900746"], ["request failed"])
+        return [{
+            "Ref": props.get("Ref", "sheet1"), "Number": "105-1",
+            "Errors": [{"Ref": r, "Error": "document not found"} for r in refs if r.startswith("bad")],
+        }]
+
+    def test_insert_documents(self):
+        handlers = {("ScanSheet", "insertDocuments"): self.insert}
+        refs = ["d1", "d2", "bad3", "d4", "fail", "d6", "d7"]
+        with fake_api(handlers) as api:
+            result = models.ScanSheet.insert_documents(refs, chunk_size=2)
+        self.assertEqual((result.Ref, result.Number), ("sheet1", "105-1"))
+        self.assertEqual(result.done, ["d1", "d2", "d4", "d7"])
+        self.assertEqual(sorted(result.failed), ["bad3", "d6", "fail"])
+        self.assertFalse(result.ok)
+        self.assertNotIn("Ref", api.queries[0]["methodProperties"])
+        self.assertTrue(all(q["methodProperties"]["Ref"] == "sheet1" for q in api.queries[1:]))
+
+    def test_registry_not_created(self):
+        handlers = {("ScanSheet", "insertDocuments"): self.insert}
+        with fake_api(handlers) as api:
+            result = models.ScanSheet.insert_documents(["fail", "d2", "d3"], chunk_size=1)
+        self.assertIsNone(result.Ref)
+        self.assertEqual(sorted(result.failed), ["d2", "d3", "fail"])
+        self.assertEqual(len(api.queries), 1)
+
+    def test_remove_documents(self):
+        handlers = {("ScanSheet", "removeDocuments"): self.insert}
+        with fake_api(handlers) as api:
+            result = models.ScanSheet.remove_documents(["d1", "bad2", "d3"], "sheet2", chunk_size=2)
+        self.assertEqual(result.done, ["d1", "d3"])
+        self.assertEqual(list(result.failed), ["bad2"])
+        self.assertEqual({q["methodProperties"]["Ref"] for q in api.queries}, {"sheet2"})
+
+
+if __name__ == '__main__':
+    unittest.main()
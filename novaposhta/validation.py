@@ -0,0 +1,169 @@
+"""
+Local validation of requests, so invalid ones never reach the network.
+
+Schemas are defined per `(modelName, calledMethod)` as `{field: [rules]}`,
+and compiled to a list of checks on first use, so changes should be made before first request.
+Rule returns error message or `None`, empty values are checked only by `required`.
+Disable with `NovaPoshta(validate=False)`.
+
+:example:
+    ``SCHEMAS[("InternetDocument", "save")]["Description"].append(max_length(50))``
+"""
+import re
+from datetime import date
+
+from .exceptions import ValidationError
+from .serializer import parse_date_dot
+
+REF_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+PHONE_RE = re.compile(r"^\+?(38)?0\d{9}$")
+DOCUMENT_NUMBER_RE = re.compile(r"^\d{10,20}$")
+
+
+class required(object):
+    """
+    Marks field as required, optionally only when other field has one of `values`.
+    """
+
+    def __init__(self, when=None, values=()):
+        self.when = when
+        self.values = values
+
+    def applies(self, props):
+        return self.when is None or props.get(self.when) in self.values
+
+
+def _regex(pattern, message):
+    def check(value):
+        if not isinstance(value, str) or not pattern.match(value):
+            return message
+    return check
+
+
+ref = _regex(REF_RE, "should be a Ref")
+phone = _regex(PHONE_RE, "should be a phone number, like 380501234567")
+document_number = _regex(DOCUMENT_NUMBER_RE, "should be a document number")
+
+
+def date_dot(value):
+    if isinstance(value, date):
+        return None
+    try:
+        parse_date_dot(value)
+    except (TypeError, ValueError):
+        return "should be a date, like 31.12.2020"
+
+
+def number(min=None, max=None, integer=False):
+    def check(value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return "should be a number"
+        if integer and not value.is_integer():
+            return "should be an integer"
+        if min is not None and value < min:
+            return "should be at least %s" % min
+        if max is not None and value > max:
+            return "should be at most %s" % max
+    return check
+
+
+def one_of(*choices):
+    def check(value):
+        if value not in choices:
+            return "should be one of: %s" % ", ".join(choices)
+    return check
+
+
+def max_length(length):
+    def check(value):
+        if len(str(value)) > length:
+            return "should be at most %s characters" % length
+    return check
+
+
+SCHEMAS = {
+    ("InternetDocument", "save"): {
+        "PayerType": [required(), one_of("Sender", "Recipient", "ThirdPerson")],
+        "PaymentMethod": [required(), one_of("Cash", "NonCash")],
+        "DateTime": [required(), date_dot],
+        "CargoType": [required()],
+        "Weight": [required(), number(min=0.1)],
+        "VolumeGeneral": [number(min=0)],
+        "ServiceType": [required(), one_of("WarehouseWarehouse", "WarehouseDoors", "DoorsWarehouse", "DoorsDoors")],
+        "SeatsAmount": [required(), number(min=1, integer=True)],
+        "Description": [required()],
+        "Cost": [required(), number(min=0)],
+        "CitySender": [required(), ref],
+        "Sender": [required(), ref],
+        "SenderAddress": [required(), ref],
+        "ContactSender": [required(), ref],
+        "SendersPhone": [required(), phone],
+        "CityRecipient": [ref],
+        "Recipient": [ref],
+        "RecipientAddress": [ref],
+        "ContactRecipient": [ref],
+        "RecipientsPhone": [required(), phone],
+    },
+    ("Counterparty", "save"): {
+        "CounterpartyProperty": [required(), one_of("Sender", "Recipient", "ThirdPerson")],
+        "CounterpartyType": [required(), one_of("PrivatePerson", "Organization")],
+        "CityRef": [ref],
+        "FirstName": [required(when="CounterpartyType", values=["PrivatePerson"])],
+        "LastName": [required(when="CounterpartyType", values=["PrivatePerson"])],
+        "Phone": [required(when="CounterpartyType", values=["PrivatePerson"]), phone],
+        "EDRPOU": [required(when="CounterpartyType", values=["Organization"])],
+        "OwnershipForm": [ref],
+    },
+    ("AdditionalService", "save"): {
+        "IntDocNumber": [required(), document_number],
+        "PaymentMethod": [required(), one_of("Cash", "NonCash")],
+        "Reason": [required(), ref],
+        "SubtypeReason": [required(), ref],
+        "ReturnAddressRef": [required(), ref],
+        "OrderType": [required()],
+    },
+}
+
+_compiled = {}
+
+
+def compile_schema(schema):
+    checks = []
+    for field, rules in schema.items():
+        conditions = [r for r in rules if isinstance(r, required)]
+        formats = [r for r in rules if not isinstance(r, required)]
+        checks.append((field, conditions, formats))
+
+    def validate(props):
+        problems = []
+        for field, conditions, formats in checks:
+            value = props.get(field)
+            if value is None or value == "":
+                if any(c.applies(props) for c in conditions):
+                    problems.append((field, "is required"))
+                continue
+            for check in formats:
+                message = check(value)
+                if message:
+                    problems.append((field, message))
+        return problems
+    return validate
+
+
+def validate(model_name, method, props):
+    """
+    Raises `ValidationError` with all problems found, does nothing for unknown methods.
+    """
+    key = (model_name, method)
+    try:
+        validator = _compiled[key]
+    except KeyError:
+        schema = SCHEMAS.get(key)
+        validator = _compiled[key] = compile_schema(schema) if schema else None
+    if validator is None:
+        return
+    problems = validator(props)
+    if problems:
+        raise ValidationError(problems)
@@ -0,0 +1,185 @@
+"""
+High-level workflows, combining several API calls.
+Independent calls are sent concurrently through `NovaPoshta.submit`.
+"""
+import logging
+import threading
+
+import attr
+
+from .exceptions import ApiError
+from .models import AdditionalService, Counterparty, InternetDocument, ReturnRequest
+
+logger = logging.getLogger(__name__)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cached(api, key, load):
+    """
+    Caches `load()` result per API key for process lifetime.
+    """
+    key = (api.endpoint, api.api_key) + key
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+    value = load()
+    with _cache_lock:
+        return _cache.setdefault(key, value)
+
+
+def get_sender(sender_ref=None):
+    """
+    Returns `(sender, contact)` refs, cached per API key.
+    Without `sender_ref` first sender counterparty of the account is used.
+    """
+    def load():
+        ref = sender_ref or Counterparty.get_counterparties()[0].Ref
+        contact = Counterparty.get_counterparty_contact_persons(ref)[0]
+        return ref, contact.Ref
+    return _cached(Counterparty.api, ("sender", sender_ref), load)
+
+
+def ship(recipient, sender=None, **document):
+    """
+    Creates recipient and waybill in one call.
+    Sender lookup (cached per API key) and recipient creation run concurrently,
+    so with sender cached it takes two serial round trips instead of four.
+
+    :example:
+        ``ship(
+            recipient={
+                "CityRef": "db5c88d7-391c-11dd-90d9-001a92567626",
+                "CounterpartyType": "PrivatePerson",
+                "FirstName": "Тест", "LastName": "Тест", "Phone": "380631112223",
+            },
+            PayerType="Sender", PaymentMethod="Cash", DateTime="01.02.2020",
+            CargoType="Cargo", Weight="10", ServiceType="WarehouseDoors", ...
+        )``
+    :param recipient:
+        recipient `Counterparty` fields, or `Counterparty` object already saved,
+        its contact person is fetched if the object has none
+    :param sender:
+        sender counterparty ref, first sender of the account by default
+    :param document:
+        `InternetDocument` fields, sender and recipient refs are filled in
+    :return:
+        `SavedDocument`
+    """
+    api = InternetDocument.api
+    sender_future = api.submit(get_sender, sender)
+    if isinstance(recipient, Counterparty):
+        saved_recipient = recipient
+        phone = getattr(recipient, "Phone", None)
+    else:
+        props = dict({"CounterpartyProperty": "Recipient"}, **recipient)
+        saved_recipient = Counterparty(**props).save()
+        phone = recipient.get("Phone")
+    recipient_contact = getattr(saved_recipient, "ContactPerson", None)
+    if recipient_contact is None:
+        # counterparties from listings come without contact person
+        contact_future = api.submit(Counterparty.get_counterparty_contact_persons, saved_recipient.Ref)
+        recipient_contact = contact_future.result()[0]
+    sender_ref, contact_ref = sender_future.result()
+
+    data = {
+        "Sender": sender_ref,
+        "ContactSender": contact_ref,
+        "Recipient": saved_recipient.Ref,
+        "ContactRecipient": recipient_contact.Ref,
+        "RecipientsPhone": phone or getattr(recipient_contact, "Phones", None),
+    }
+    data.update(document)
+    return InternetDocument(**data).save()
+
+
+def get_return_reasons():
+    """
+    Returns `[(reason, [subtypes])]`, cached per API key.
+    Subtypes are fetched concurrently.
+    """
+    api = AdditionalService.api
+
+    def load():
+        reasons = AdditionalService.get_return_reasons()
+        subtypes = api.map(AdditionalService.get_return_reason_subtypes, [r.Ref for r in reasons])
+        return list(zip(reasons, subtypes))
+    return _cached(api, ("return_reasons",), load)
+
+
+@attr.s
+class ReturnResult(object):
+    number = attr.ib()
+    # return order, created by `ReturnRequest.save`
+    order  = attr.ib(default=None)
+    error  = attr.ib(default=None)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def process_returns(documents, reason, subtype_reason, payment_method="Cash", note=""):
+    """
+    Creates return orders for many documents.
+    Each document is checked with `CheckPossibilityCreateReturn` and return order is created,
+    documents are processed concurrently, up to `NovaPoshta.max_workers` at once.
+
+    :example:
+        ``process_returns(["20450000000001", "20450000000002"], reason="Не підійшло", subtype_reason=...)``
+        ``process_returns([{"IntDocNumber": "20450000000001", "Note": "Розмір"}], reason=..., subtype_reason=...)``
+    :param documents:
+        document numbers, or dicts with `ReturnRequest` fields overriding the defaults
+    :param reason:
+        return reason ref or description, see `get_return_reasons`
+    :param subtype_reason:
+        return reason subtype ref or description
+    :return:
+        list of `ReturnResult`, one per document, in order
+    """
+    defaults = {
+        "PaymentMethod": payment_method,
+        "Reason": reason,
+        "SubtypeReason": subtype_reason,
+        "Note": note,
+    }
+    reasons = get_return_reasons()
+    api = ReturnRequest.api
+    return api.map(lambda doc: _process_return(doc, defaults, reasons), documents)
+
+
+def _process_return(document, defaults, reasons):
+    if not isinstance(document, dict):
+        document = {"IntDocNumber": document}
+    data = dict(defaults, **document)
+    number = data.get("IntDocNumber")
+    try:
+        # bad input is reported before anything is sent
+        unknown = set(data) - set(f.name for f in attr.fields(ReturnRequest))
+        if unknown:
+            raise ValueError("unknown return request fields: %s" % ", ".join(sorted(unknown)))
+        if not number:
+            raise ValueError("IntDocNumber is required")
+        data["Reason"], data["SubtypeReason"] = _resolve_reason(
+            reasons, data["Reason"], data["SubtypeReason"],
+        )
+        if "ReturnAddressRef" not in data:
+            locations = AdditionalService.check_possibility_create_return(number)
+            if not locations:
+                raise LookupError("return is not possible for %s" % number)
+            data["ReturnAddressRef"] = locations[0].Ref
+        return ReturnResult(number, order=ReturnRequest(**data).save())
+    except (ApiError, LookupError, IOError, ValueError) as exc:
+        logger.warning("return for %s failed: %s", number, exc)
+        return ReturnResult(number, error=exc)
+
+
+def _resolve_reason(reasons, reason, subtype):
+    for r, subtypes in reasons:
+        if reason in (r.Ref, str(r)):
+            for s in subtypes:
+                if subtype in (s.Ref, str(s)):
+                    return r.Ref, s.Ref
+            raise LookupError("unknown return reason subtype: %s" % subtype)
+    raise LookupError("unknown return reason: %s" % reason)